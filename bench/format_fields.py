@@ -0,0 +1,67 @@
+# bench/format_fields.py
+#
+# Check that strings.format only substitutes arguments: fields that
+# look up attributes or items of Python objects must be refused with
+# a Quirk runtime error rather than reaching interpreter internals.
+#
+#     python -m bench.format_fields
+
+import sys
+
+from quirk.runner import run_source
+
+
+CASES = [
+    (
+        "positional fields",
+        'import strings\nprint strings.format("{} and {}", 1, 2)\n',
+        "1 and 2\n",
+    ),
+    (
+        "format spec",
+        'import strings\nprint strings.format("{0:>4}|{1:.2f}", 7, 1.5)\n',
+        "   7|1.50\n",
+    ),
+    (
+        "attribute field",
+        'import strings\n'
+        'print strings.format("{0.__globals__[os].environ[HOME]}", range)\n',
+        "runtime_error: Runtime Error (line 2): "
+        "Unsupported format field '{0.__globals__[os].environ[HOME]}'\n",
+    ),
+    (
+        "index field",
+        'import strings\nprint strings.format("{0[0]}", [1])\n',
+        "runtime_error: Runtime Error (line 2): "
+        "Unsupported format field '{0[0]}'\n",
+    ),
+    (
+        "field in a nested spec",
+        'import strings\nprint strings.format("{0:{1.real}}", 1, 2)\n',
+        "runtime_error: Runtime Error (line 2): "
+        "Unsupported format field '{1.real}'\n",
+    ),
+]
+
+
+def main():
+    failures = 0
+
+    for name, code, expected in CASES:
+        result = run_source(code)
+        got = result["output"] if result["status"] == "ok" else (
+            f"{result['status']}: {result['error']}\n"
+        )
+
+        if got != expected:
+            failures += 1
+            print(f"FAIL {name}: expected {expected!r}, got {got!r}")
+        else:
+            print(f"ok   {name}")
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
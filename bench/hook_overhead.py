@@ -0,0 +1,115 @@
+# bench/hook_overhead.py
+#
+# Shows that the hook API costs nothing while no hooks are registered:
+# an interpreter that had a hook added and removed runs the same bound
+# methods, and at the same speed, as one that never had hooks.
+#
+# Variants are warmed up, then run interleaved, so drift in machine
+# speed affects all of them alike; each is reported by its median and
+# compared with the median of the plain interpreter.
+#
+#     python -m bench.hook_overhead [--repeat N]
+
+import argparse
+import io
+import statistics
+import time
+
+from quirk.ast_interpreter import Interpreter
+from quirk.lexer import tokenize
+from quirk.parser import Parser
+
+
+SOURCE = """
+function fib(n)
+    if n < 2
+        return n
+    end
+    return fib(n - 1) + fib(n - 2)
+end
+
+total = 0
+i = 0
+while i < 20000
+    total += i
+    i += 1
+end
+
+print fib(18), total
+"""
+
+WARMUP = 2
+
+
+def noop(*args):
+    pass
+
+
+def plain():
+    return Interpreter(stdout=io.StringIO())
+
+
+def hooks_removed():
+    interpreter = Interpreter(stdout=io.StringIO())
+    interpreter.add_hook("statement", noop)
+    interpreter.remove_hook("statement", noop)
+    return interpreter
+
+
+def hooks_enabled():
+    return Interpreter(
+        stdout=io.StringIO(),
+        hooks={"statement": noop, "loop": noop, "call": noop},
+    )
+
+
+VARIANTS = [
+    ("no hooks", plain),
+    ("hook added and removed", hooks_removed),
+    ("3 no-op hooks", hooks_enabled),
+]
+
+
+def run_once(factory, program):
+    interpreter = factory()
+    start = time.perf_counter()
+    interpreter.run(program)
+    return time.perf_counter() - start
+
+
+def measure(program, repeat):
+    """Median seconds per variant, from interleaved runs."""
+    for _ in range(WARMUP):
+        for _, factory in VARIANTS:
+            run_once(factory, program)
+
+    times = {name: [] for name, _ in VARIANTS}
+    for i in range(repeat):
+        # Rotate the order so no variant always runs first
+        for name, factory in VARIANTS[i % 3:] + VARIANTS[:i % 3]:
+            times[name].append(run_once(factory, program))
+
+    return {name: statistics.median(t) for name, t in times.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=15)
+    args = parser.parse_args()
+
+    program = Parser(tokenize(SOURCE)).parse()
+
+    removed = hooks_removed()
+    assert removed.execute.__func__ is Interpreter.execute
+    assert removed.call_function.__func__ is Interpreter.call_function
+    assert removed._on_iteration is None
+
+    medians = measure(program, args.repeat)
+    base = medians["no hooks"]
+    for name, _ in VARIANTS:
+        t = medians[name]
+        print(f"{name:<24} {t * 1000:9.2f} ms  ({(t / base - 1) * 100:+.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
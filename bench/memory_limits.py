@@ -0,0 +1,55 @@
+# bench/memory_limits.py
+#
+# Check that unbounded in-place growth ends in the interpreter's
+# memory limit error, through each way a program can grow a value in
+# place, and that it does so in reasonable time. (x += on a list or
+# string copies it every time, so such loops are quadratic anyway.)
+#
+#     python -m bench.memory_limits
+
+import sys
+import time
+
+from quirk.runner import run_source
+
+
+LIMIT = 20 * 1024 * 1024
+# Far above what any case needs when the limit check is cheap
+DEADLINE = 30.0
+
+LOOP = "i = 0\nwhile true\n{body}\n    i += 1\nend\n"
+
+CASES = [
+    ("set ++=", "s = {0}\n", "    s ++= {i}"),
+    ("map store", "m = {}\nm[0] = 0\n", "    m[i] = i"),
+    ("collections.append", "import collections\nxs = [0]\n",
+     "    collections.append(xs, i)"),
+]
+
+
+def main():
+    failures = 0
+
+    for name, setup, body in CASES:
+        start = time.perf_counter()
+        result = run_source(setup + LOOP.format(body=body), max_memory=LIMIT)
+        elapsed = time.perf_counter() - start
+
+        limited = result["status"] == "runtime_error" and (
+            "Memory limit" in result["error"]
+        )
+        if not limited or elapsed > DEADLINE:
+            failures += 1
+            print(
+                f"FAIL {name}: {result['status']} after {elapsed:.1f}s "
+                f"({result['error']})"
+            )
+        else:
+            print(f"ok   {name} ({elapsed:.1f}s)")
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+# bench/quickening.py
+#
+# Compares plain and adaptive (quickening) interpreters on the bench
+# corpus: median run time, how often specialized handlers hit, and
+# that both print the same output. --threads also runs one shared,
+# already-quickened AST from several threads with operand types that
+# keep changing, checking every run's output.
+#
+#     python -m bench.quickening [--repeat N] [--threads N]
+
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from quirk.ast_interpreter import Interpreter
+from quirk.bench import BENCH_DIR, load_corpus
+from quirk.lexer import tokenize
+from quirk.modules import registry
+from quirk.parser import Parser
+
+
+POLYMORPHIC = """
+function combine(a, b)
+    return a + b
+end
+
+i = 0
+acc = start
+while i < 200
+    acc = combine(acc, step)
+    i += 1
+end
+print acc
+"""
+
+# (start, step) pairs: ints, strings and lists through the same nodes
+INPUTS = [(0, 3), ("", "ab"), (0, 7), ("x", "y")]
+
+
+def run(program, adaptive):
+    registry.clear()
+    out = io.StringIO()
+    interpreter = Interpreter(stdout=out, adaptive=adaptive)
+
+    start = time.perf_counter()
+    interpreter.run(program)
+    return time.perf_counter() - start, out.getvalue(), interpreter
+
+
+def compare(name, code, repeat):
+    # Fresh ASTs per mode so the adaptive runs start cold
+    plain_ast = Parser(tokenize(code)).parse()
+    adaptive_ast = Parser(tokenize(code)).parse()
+
+    plain, adaptive = [], []
+    for _ in range(repeat):
+        t, expected, _ = run(plain_ast, False)
+        plain.append(t)
+        t, output, interpreter = run(adaptive_ast, True)
+        adaptive.append(t)
+
+        if output != expected:
+            print(f"{name}: adaptive output differs", file=sys.stderr)
+            sys.exit(1)
+
+    base = statistics.median(plain)
+    quick = statistics.median(adaptive)
+    stats = interpreter.quickening_stats()
+
+    print(
+        f"{name:<18} {base * 1000:9.1f} ms {quick * 1000:9.1f} ms "
+        f"{(quick / base - 1) * 100:+6.1f}%   "
+        f"hit rate {stats['hit_rate']:.2f} "
+        f"({stats['specialized']} specialized, {stats['deopts']} deopts)"
+    )
+
+
+def run_polymorphic(program, n):
+    start, step = INPUTS[n % len(INPUTS)]
+    out = io.StringIO()
+    interpreter = Interpreter(stdout=out, adaptive=True)
+    interpreter.scopes.set("start", start)
+    interpreter.scopes.set("step", step)
+    interpreter.run(program)
+
+    acc = start
+    for _ in range(200):
+        acc = acc + step
+    return out.getvalue() == f"{acc}\n"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("--runs", type=int, default=400)
+    args = parser.parse_args()
+
+    os.environ["QUIRK_PATH"] = BENCH_DIR
+
+    print(f"{'program':<18} {'plain':>12} {'adaptive':>12}")
+    for name, code in load_corpus():
+        compare(name, code, args.repeat)
+
+    if args.threads:
+        sys.setswitchinterval(1e-6)
+        program = Parser(tokenize(POLYMORPHIC)).parse()
+
+        with ThreadPoolExecutor(args.threads) as pool:
+            results = list(pool.map(
+                lambda n: run_polymorphic(program, n), range(args.runs)
+            ))
+
+        failures = results.count(False)
+        print(
+            f"{args.runs} polymorphic runs on {args.threads} threads: "
+            f"{failures} with wrong output"
+        )
+        if failures:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
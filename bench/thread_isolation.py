@@ -0,0 +1,113 @@
+# bench/thread_isolation.py
+#
+# Stress check for embedding: runs many programs at once on a thread
+# pool, each with its own output sink and module resolver, and fails
+# if any program's output differs from a serial run or one program's
+# writes to a shared module leak into another's.
+#
+#     python -m bench.thread_isolation [--threads N] [--programs N]
+#
+# On a free-threaded CPython build the threads run truly in parallel.
+
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from quirk.ast_interpreter import Interpreter
+from quirk.lexer import tokenize
+from quirk.modules import ModuleRegistry, path_resolver
+from quirk.parser import Parser
+
+
+MODULE = """
+table = [0, 0, 0, 0]
+
+function tag(n)
+    return "p" + n
+end
+"""
+
+PROGRAM = """
+import shared
+import strings
+
+me = shared.tag("{n}")
+shared.table[0] = {n}
+window = shared.table[0:2]
+
+i = 0
+while i < {lines}
+    print me, i, shared.table[0], window[0], strings.upper("x")
+    shared.table[1] = i
+    i += 1
+end
+
+print "done", me, shared.table[0]
+"""
+
+
+def expected(n, lines):
+    out = [f"p{n} {i} {n} {n} X" for i in range(lines)]
+    out.append(f"done p{n} {n}")
+    return "\n".join(out) + "\n"
+
+
+def run_program(n, lines, resolver, registry):
+    out = io.StringIO()
+    interpreter = Interpreter(
+        stdout=out, resolver=resolver, registry=registry, eager_imports=n % 2
+    )
+    source = PROGRAM.format(n=n, lines=lines)
+    interpreter.run(Parser(tokenize(source)).parse())
+    return n, out.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--programs", type=int, default=200)
+    parser.add_argument("--lines", type=int, default=50)
+    args = parser.parse_args()
+
+    # Switch threads as often as possible so runs interleave
+    sys.setswitchinterval(1e-6)
+
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(f"python {sys.version.split()[0]}, GIL {'on' if gil else 'off'}")
+
+    with tempfile.TemporaryDirectory() as root:
+        with open(os.path.join(root, "shared.sl"), "w") as f:
+            f.write(MODULE)
+
+        # Resolve against the temp dir, not the working directory
+        resolver = path_resolver([root])
+        registry = ModuleRegistry()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(args.threads) as pool:
+            results = list(pool.map(
+                lambda n: run_program(n, args.lines, resolver, registry),
+                range(args.programs),
+            ))
+        elapsed = time.perf_counter() - start
+
+    failures = [n for n, output in results if output != expected(n, args.lines)]
+
+    print(
+        f"{args.programs} programs on {args.threads} threads "
+        f"in {elapsed:.2f}s: {len(failures)} with wrong output"
+    )
+
+    if failures:
+        n = failures[0]
+        print(f"first failure (program {n}):")
+        print(dict(results)[n])
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
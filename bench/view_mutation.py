@@ -0,0 +1,90 @@
+# bench/view_mutation.py
+#
+# Check that list views never see a change made to their base list
+# after they were taken: each case mutates a base list in place,
+# through one mutation path, while a view of it is alive, and
+# compares the program's output with the expected one.
+#
+#     python -m bench.view_mutation
+
+import sys
+
+from quirk.runner import run_source
+
+
+CASES = [
+    (
+        "index assignment",
+        "xs = [1, 2, 3]\nv = xs[0:3]\nxs[0] = 9\nprint v, xs\n",
+        "[1, 2, 3] [9, 2, 3]\n",
+    ),
+    (
+        "index +=",
+        "xs = [1, 2, 3]\nv = xs[0:2]\nxs[1] += 5\nprint v, xs\n",
+        "[1, 2] [1, 7, 3]\n",
+    ),
+    (
+        "write through a view",
+        "xs = [1, 2, 3]\nv = xs[0:3]\nw = xs[1:3]\nv[1] = 0\n"
+        "print v, w, xs\n",
+        "[1, 0, 3] [2, 3] [1, 2, 3]\n",
+    ),
+    (
+        "view of a view",
+        "xs = [1, 2, 3, 4]\nv = xs[1:4]\nw = v[0:2]\nxs[1] = 0\n"
+        "print v, w\n",
+        "[2, 3, 4] [2, 3]\n",
+    ),
+    (
+        "collections.pop on the base",
+        "import collections\nxs = [1, 2, 3]\nv = xs[0:3]\n"
+        "collections.pop(xs)\ncollections.pop(xs)\nprint v, xs\n",
+        "[1, 2, 3] [1]\n",
+    ),
+    (
+        "collections.append on the base",
+        "import collections\nxs = [1, 2]\nv = xs[0:2]\n"
+        "collections.append(xs, 3)\nprint v, xs\n",
+        "[1, 2] [1, 2, 3]\n",
+    ),
+    (
+        "collections.append on a view",
+        "import collections\nxs = [1, 2, 3]\nv = xs[0:2]\n"
+        "collections.append(v, 9)\nprint v, xs\n",
+        "[1, 2, 9] [1, 2, 3]\n",
+    ),
+    (
+        "collections.popleft on a list",
+        "import collections\nxs = [1, 2]\ncollections.popleft(xs)\n",
+        "runtime_error: Runtime Error (line 3): "
+        "'list' object has no attribute 'popleft'\n",
+    ),
+    (
+        "set operators",
+        "s = {1, 2}\nt = s\ns ++= {3}\nprint len(t)\n",
+        "3\n",
+    ),
+]
+
+
+def main():
+    failures = 0
+
+    for name, code, expected in CASES:
+        result = run_source(code)
+        got = result["output"] if result["status"] == "ok" else (
+            f"{result['status']}: {result['error']}\n"
+        )
+
+        if got != expected:
+            failures += 1
+            print(f"FAIL {name}: expected {expected!r}, got {got!r}")
+        else:
+            print(f"ok   {name}")
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
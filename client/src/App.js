@@ -1,6 +1,8 @@
 import { useState, useEffect, useRef } from "react"
 import Editor from "@monaco-editor/react"
-import axios from "axios"
+
+// Lets the server queue this tab's runs fairly against other users
+const SESSION_ID = Math.random().toString(36).slice(2)
 
 export default function App() {
   const [code, setCode] = useState(`nums = [1,2,3,4]
@@ -18,7 +20,7 @@ end`)
     monaco.languages.setMonarchTokensProvider("quirk", {
       tokenizer: {
         root: [
-          [/\b(function|print|return|if|else|for|while|end|import|in)\b/, "keyword"],
+          [/\b(function|print|return|if|else|for|while|end|import|in|and|or|not)\b/, "keyword"],
           [/[a-zA-Z_]\w*/, "identifier"],
           [/\d+/, "number"],
           [/".*?"/, "string"],
@@ -27,41 +29,135 @@ end`)
     })
   }
 
+  const showError = (message, line) => {
+    const model = editorRef.current.getModel()
+
+    window.monaco.editor.setModelMarkers(model, "owner", line ? [
+      {
+        startLineNumber: line,
+        startColumn: 1,
+        endLineNumber: line,
+        endColumn: 100,
+        message,
+        severity: window.monaco.MarkerSeverity.Error,
+      }
+    ] : [])
+  }
+
+  const showDiagnostics = (diagnostics) => {
+    const model = editorRef.current?.getModel()
+    if (!model) return
+
+    window.monaco.editor.setModelMarkers(model, "check", diagnostics.map((d) => {
+      const line = d.line || 1
+      const column = d.column || 1
+      const word = d.column && model.getWordAtPosition({ lineNumber: line, column })
+
+      return {
+        startLineNumber: line,
+        startColumn: column,
+        endLineNumber: line,
+        endColumn: word ? word.endColumn : model.getLineMaxColumn(line),
+        message: d.message,
+        severity: d.severity === "warning"
+          ? window.monaco.MarkerSeverity.Warning
+          : window.monaco.MarkerSeverity.Error,
+      }
+    }))
+  }
+
+  const clearErrors = () => {
+    window.monaco.editor.setModelMarkers(
+      editorRef.current.getModel(),
+      "owner",
+      []
+    )
+  }
+
   const runCode = async () => {
     setLoading(true)
+    setOutput("")
+    clearErrors()
+
+    try {
+      const res = await fetch("/run/stream", {
+        method: "POST",
+        headers: { "Content-Type": "application/json", "X-Quirk-Session": SESSION_ID },
+        body: JSON.stringify({ code }),
+      })
+
+      if (res.status === 429) {
+        const { message } = await res.json()
+        setOutput(message)
+        return
+      }
+
+      const reader = res.body.getReader()
+      const decoder = new TextDecoder()
+      let pending = ""
+
+      const handleEvent = (raw) => {
+        const event = raw.match(/^event: (.*)$/m)?.[1]
+        const data = raw.match(/^data: (.*)$/m)?.[1]
+        if (!event || data === undefined) return
+
+        const payload = JSON.parse(data)
+
+        if (event === "output") {
+          setOutput((prev) => prev + payload)
+        } else if (event === "status" && payload.status !== "ok") {
+          setOutput((prev) => (prev + payload.message).trim())
+          showError(payload.message, payload.line)
+        }
+      }
 
-    const res = await axios.post("/run", { code })
-
-    if (res.data.error) {
-      setOutput(res.data.message)
+      while (true) {
+        const { done, value } = await reader.read()
+        if (done) break
 
-      const model = editorRef.current.getModel()
+        pending += decoder.decode(value, { stream: true })
 
-      window.monaco.editor.setModelMarkers(model, "owner", [
-        {
-          startLineNumber: res.data.line,
-          startColumn: 1,
-          endLineNumber: res.data.line,
-          endColumn: 100,
-          message: res.data.message,
-          severity: window.monaco.MarkerSeverity.Error,
+        let boundary
+        while ((boundary = pending.indexOf("\n\n")) !== -1) {
+          handleEvent(pending.slice(0, boundary))
+          pending = pending.slice(boundary + 2)
         }
-      ])
-    } else {
-      setOutput(res.data.output)
-
-      window.monaco.editor.setModelMarkers(
-        editorRef.current.getModel(),
-        "owner",
-        []
-      )
+      }
+    } catch (e) {
+      // The server is unreachable or the stream broke off
+      setOutput((prev) => (prev + "\nConnection error: " + e.message).trim())
+    } finally {
+      setLoading(false)
     }
-
-    setLoading(false)
   }
 
   const editorRef = useRef(null)
 
+  // Live diagnostics: parse-only checks a moment after typing stops
+  useEffect(() => {
+    const controller = new AbortController()
+
+    const timer = setTimeout(async () => {
+      try {
+        const res = await fetch("/check", {
+          method: "POST",
+          headers: { "Content-Type": "application/json" },
+          body: JSON.stringify({ code }),
+          signal: controller.signal,
+        })
+        const { diagnostics } = await res.json()
+        showDiagnostics(diagnostics)
+      } catch (e) {
+        // Superseded by a newer edit, or the server is unavailable
+      }
+    }, 300)
+
+    return () => {
+      clearTimeout(timer)
+      controller.abort()
+    }
+  }, [code])
+
   const handleEditorDidMount = (editor, monaco) => {
     editorRef.current = editor
     window.monaco = monaco
@@ -0,0 +1,22 @@
+# quirk/__init__.py
+
+# The embedding API loads the runner and preloader, which the CLI
+# mostly does not need, so it is imported on first use
+_LAZY = {
+    "PreparedProgram": "quirk.prepared",
+    "prepare": "quirk.prepared",
+}
+
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module 'quirk' has no attribute '{name}'")
+
+    import importlib
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+__all__ = list(_LAZY)
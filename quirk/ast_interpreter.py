@@ -1,9 +1,19 @@
 # quirk/ast_interpreter.py
 
+import collections
 import os
+import sys
+import time
 from quirk.ast_nodes import *
 from quirk.lexer import tokenize
-from quirk.parser import Parser
+from quirk.parser import Parser, QuirkSyntaxError
+from quirk.modules import CircularImportError, find_module
+from quirk.modules import registry as shared_registry
+from quirk.quicken import install
+from quirk.stdlib import is_deterministic, native_module
+from quirk.values import (
+    LazyModule, ListView, isolate, make_slice, mutate, set_item
+)
 
 
 class BreakSignal(Exception):
@@ -27,6 +37,83 @@ class RuntimeError(Exception):
 
 
 
+# "statement_end" and "return" also fire when the statement or call
+# ends in an error, so they always pair with "statement" and "call"
+HOOK_EVENTS = (
+    "statement", "statement_end", "call", "return", "loop", "import",
+    "error",
+)
+
+
+# =========================================================
+# BUILTINS
+# Module-level so they are shared by every interpreter and
+# pickle by reference
+# =========================================================
+
+def _range(*args):
+    return list(range(*args))
+
+
+BUILTINS = {
+    "range": _range,
+    "len": len,
+    "sum": sum,
+    "min": min,
+    "max": max,
+}
+
+
+# =========================================================
+# MEMORY ESTIMATES
+# =========================================================
+
+_LEAF_TYPES = (int, float, str, bool, type(None))
+_CONTAINER_TYPES = (list, tuple, set, frozenset, collections.deque)
+_SIZED_TYPES = (str, list, tuple, set, frozenset, dict, collections.deque)
+
+# Nodes whose value is always freshly allocated
+_ALLOCATING_NODES = (ListLiteral, TupleLiteral, SetLiteral, MapLiteral)
+
+_SEQUENCE_TYPES = (str, list, tuple, ListView)
+
+# Rough cost of one new element in a list, map or deque
+_SLOT_SIZE = 16
+_INT_SIZE = sys.getsizeof(1 << 30)
+
+
+def _items_of(mapping):
+    for key, value in mapping.items():
+        yield key
+        yield value
+
+
+def _shallow_size(value):
+    if isinstance(value, _SIZED_TYPES):
+        return sys.getsizeof(value)
+    return 0
+
+
+def _sequence_size(kind, length):
+    if kind is str:
+        return sys.getsizeof("") + length
+    return sys.getsizeof([]) + 8 * length
+
+
+def _binary_size(op, left, right):
+    if op == "+":
+        if (isinstance(left, _SEQUENCE_TYPES)
+                and isinstance(right, _SEQUENCE_TYPES)):
+            return _sequence_size(type(left), len(left) + len(right))
+        return 0
+
+    if isinstance(right, _SEQUENCE_TYPES):
+        left, right = right, left
+    if isinstance(left, _SEQUENCE_TYPES) and type(right) is int:
+        return _sequence_size(type(left), len(left) * max(right, 0))
+    return 0
+
+
 # =========================================================
 # SCOPE SYSTEM
 # =========================================================
@@ -57,10 +144,82 @@ class ScopeStack:
 
 class Interpreter:
 
-    def __init__(self):
+    def __init__(self, eager_imports=False, max_steps=None, hooks=None,
+                 preload_imports=False, import_jobs=None, max_memory=None,
+                 stdout=None, resolver=None, registry=None, adaptive=False):
         self.scopes = ScopeStack()
         self.functions = {}
         self.modules = {}
+        self.module_files = {}
+        # {path: (mtime_ns, size)} of every .sl module loaded, directly
+        # or through other modules, so cached results can be revalidated
+        self.module_stamps = {}
+        self.eager_imports = eager_imports
+        self.preload_imports = preload_imports
+        self.import_jobs = import_jobs
+        self.import_wall = 0.0
+        self.import_cpu = 0.0
+
+        # Embedding: where print writes (None = sys.stdout at the time
+        # of the print), how import names map to .sl paths, and which
+        # cache executed modules are shared through
+        self.stdout = stdout
+        self.resolver = resolver or find_module
+        self.registry = registry if registry is not None else shared_registry
+
+        # Cleared by anything whose result may differ between runs
+        # (clocks, randomness, I/O) so callers know not to cache output
+        self.cacheable = True
+
+        # Per-loop-iteration callback, None unless fuel or loop hooks
+        # need it
+        self._on_iteration = None
+
+        # Quickening: adaptive interpreters run nodes through the
+        # handlers they specialize; fuel and memory wrap these
+        self.adaptive = adaptive
+        self.quick_hits = 0
+        self.quick_misses = 0
+        self.quick_generic = 0
+        self.quick_specialized = 0
+        self.quick_deopts = 0
+        if adaptive:
+            self.execute = self._adaptive_execute
+            self.evaluate = self._adaptive_evaluate
+
+        # Fuel metering: only metered interpreters swap in the counting
+        # execute, so unlimited runs pay nothing per statement
+        self.max_steps = max_steps
+        self.steps = 0
+        if max_steps is not None:
+            self._unmetered_execute = self.execute
+            self.execute = self._metered_execute
+            self._on_iteration = self._consume_iteration
+
+        # Memory accounting, likewise only bound when capped; it wraps
+        # whichever execute is in place
+        self.max_memory = max_memory
+        self.memory = 0
+        if max_memory is not None:
+            self._memory_trigger = max_memory
+            self._unaccounted_execute = self.execute
+            self._unaccounted_evaluate = self.evaluate
+            self.execute = self._accounted_execute
+            self.evaluate = self._accounted_evaluate
+            self.call_native = self._accounted_call_native
+            self.store_index = self._accounted_store_index
+
+        self.hooks = {}
+        self.depth = 0
+        self._hooks_installed = False
+        # Set by add_hook; bound here so that installing hooks adds no
+        # attributes, which would slow attribute lookups for good
+        self._plain_execute = None
+        self._plain_call_function = None
+        self._plain_on_iteration = None
+        self._reported_error = None
+        for event, fn in (hooks or {}).items():
+            self.add_hook(event, fn)
 
         self._load_builtins()
 
@@ -69,20 +228,307 @@ class Interpreter:
     # =====================================================
 
     def _load_builtins(self):
-        self.scopes.set("range", lambda *a: list(range(*a)))
-        self.scopes.set("len", lambda x: len(x))
-        self.scopes.set("sum", lambda x: sum(x))
-        self.scopes.set("min", lambda *a: min(*a))
-        self.scopes.set("max", lambda *a: max(*a))
+        for name, fn in BUILTINS.items():
+            self.scopes.set(name, fn)
 
     # =====================================================
     # PROGRAM
     # =====================================================
 
     def run(self, program):
+        if self.preload_imports:
+            self._preload(program)
+
         for stmt in program.statements:
             self.execute(stmt)
 
+    def _preload(self, program):
+        from quirk.preload import preload_imports
+
+        wall = time.perf_counter()
+        cpu = time.process_time()
+
+        try:
+            preload_imports(
+                program,
+                jobs=self.import_jobs,
+                resolver=self.resolver,
+                registry=self.registry,
+            )
+        finally:
+            self.import_wall += time.perf_counter() - wall
+            self.import_cpu += time.process_time() - cpu
+
+    def mark_uncacheable(self):
+        self.cacheable = False
+
+    def snapshot(self, path):
+        from quirk.snapshot import save_snapshot
+        save_snapshot(self, path)
+
+    def restore(self, path):
+        from quirk.snapshot import load_snapshot
+        load_snapshot(self, path)
+
+    # =====================================================
+    # FUEL
+    # =====================================================
+
+    def _consume(self, line):
+        self.steps += 1
+        if self.steps > self.max_steps:
+            raise RuntimeError(
+                f"Step limit of {self.max_steps} exceeded", line
+            )
+
+    def _metered_execute(self, node):
+        self._consume(node.line)
+        return self._unmetered_execute(node)
+
+    def _consume_iteration(self, node):
+        self._consume(node.line)
+
+    # =====================================================
+    # MEMORY
+    # Allocation points charge an approximate size to
+    # self.memory. Once the running total passes the trigger,
+    # the live heap reachable from the scopes is measured;
+    # only that measurement can fail the program, so charges
+    # never need to be credited back when values die.
+    # =====================================================
+
+    def _charge(self, size, line):
+        self.memory += size
+        if self.memory > self._memory_trigger:
+            self._measure(size, line)
+
+    def _measure(self, pending, line):
+        live = self.live_memory() + pending
+
+        if live > self.max_memory:
+            raise RuntimeError(
+                f"Memory limit of {self.max_memory} bytes exceeded", line
+            )
+
+        # Re-measuring on every charge near the limit would be
+        # quadratic, so allow a quarter of the limit in between
+        self.memory = live
+        self._memory_trigger = max(
+            self.max_memory, live + self.max_memory // 4
+        )
+
+    def live_memory(self):
+        """Approximate bytes held by values reachable from the scopes."""
+        total = 0
+        seen = set()
+        stack = [iter(self.scopes.scopes)]
+
+        while stack:
+            for obj in stack[-1]:
+                kind = type(obj)
+
+                if kind is int and -5 <= obj <= 256:
+                    continue
+                if kind in _LEAF_TYPES:
+                    total += sys.getsizeof(obj)
+                    continue
+                if id(obj) in seen or callable(obj) or kind is LazyModule:
+                    continue
+
+                seen.add(id(obj))
+                total += sys.getsizeof(obj)
+
+                if isinstance(obj, dict):
+                    stack.append(_items_of(obj))
+                    break
+                if isinstance(obj, _CONTAINER_TYPES):
+                    stack.append(iter(obj))
+                    break
+                if kind is ListView:
+                    stack.append(iter((obj._base,)))
+                    break
+            else:
+                stack.pop()
+
+        return total
+
+    def _accounted_execute(self, node):
+        if type(node) is not CompoundAssign or type(node.target) is not Variable:
+            return self._unaccounted_execute(node)
+
+        # x += ... rebinds x to a new string, list or tuple, or grows a
+        # set in place; either way only the growth is charged, as the
+        # old value dies or is the same object
+        try:
+            before = _shallow_size(self.scopes.get(node.target.name))
+        except KeyError:
+            before = 0
+
+        result = self._unaccounted_execute(node)
+
+        value = self.scopes.get(node.target.name)
+        self._charge(max(_shallow_size(value) - before, _SLOT_SIZE), node.line)
+        return result
+
+    def _accounted_evaluate(self, node):
+        kind = type(node)
+
+        # Check sequence + and * before they allocate: "x" * 10 ** 9
+        # must fail without ever building the string
+        if kind is BinaryOp and node.op in ("+", "*"):
+            left = self.evaluate(node.left)
+            right = self.evaluate(node.right)
+            self._charge(_binary_size(node.op, left, right), node.line)
+            return left + right if node.op == "+" else left * right
+
+        value = self._unaccounted_evaluate(node)
+
+        if kind in _ALLOCATING_NODES or (
+            kind is Index and type(node.index) is Slice
+        ):
+            self._charge(_shallow_size(value), node.line)
+
+        return value
+
+    def _accounted_call_native(self, func, args, line):
+        if func is _range:
+            try:
+                length = len(range(*args))
+            except (TypeError, ValueError, OverflowError) as e:
+                raise RuntimeError(str(e), line)
+            self._charge(
+                _sequence_size(list, length) + _INT_SIZE * length, line
+            )
+            return Interpreter.call_native(self, func, args, line)
+
+        # Natives may also grow their arguments (deque appends), so
+        # every call is charged at least a slot
+        value = Interpreter.call_native(self, func, args, line)
+        self._charge(_shallow_size(value) + _SLOT_SIZE, line)
+        return value
+
+    def _accounted_store_index(self, obj, key, value, line):
+        before = sys.getsizeof(obj)
+        Interpreter.store_index(self, obj, key, value, line)
+        self._charge(max(sys.getsizeof(obj) - before, _SLOT_SIZE), line)
+
+    # =====================================================
+    # QUICKENING
+    # Each node runs through its handler in node.quick,
+    # installed on first use; see quirk/quicken.py.
+    # =====================================================
+
+    def _adaptive_execute(self, node):
+        quick = node.quick
+        if quick is None:
+            quick = install(node, Interpreter.execute)
+        return quick(self, node)
+
+    def _adaptive_evaluate(self, node):
+        quick = node.quick
+        if quick is None:
+            quick = install(node, Interpreter.evaluate)
+        return quick(self, node)
+
+    def quickening_stats(self):
+        """Specialized-handler hits against guard misses and runs of
+        not (yet) specialized operators, calls and assignments."""
+        total = self.quick_hits + self.quick_misses + self.quick_generic
+        return {
+            "hits": self.quick_hits,
+            "misses": self.quick_misses,
+            "generic": self.quick_generic,
+            "hit_rate": self.quick_hits / total if total else 0.0,
+            "specialized": self.quick_specialized,
+            "deopts": self.quick_deopts,
+        }
+
+    # =====================================================
+    # HOOKS
+    # Hooks are called as fn(node, line, depth); "error" hooks
+    # also receive the RuntimeError. The hooked execute and
+    # call_function are only bound while a hook is registered.
+    # =====================================================
+
+    def add_hook(self, event, fn):
+        if event not in HOOK_EVENTS:
+            raise ValueError(f"Unknown hook event '{event}'")
+
+        self.hooks.setdefault(event, []).append(fn)
+
+        if not self._hooks_installed:
+            self._plain_execute = self.execute
+            self._plain_call_function = self.call_function
+            self._plain_on_iteration = self._on_iteration
+            self._reported_error = None
+
+            self.execute = self._hooked_execute
+            self.call_function = self._hooked_call_function
+            self._on_iteration = self._hooked_iteration
+            self._hooks_installed = True
+
+    def remove_hook(self, event, fn):
+        self.hooks[event].remove(fn)
+        if not self.hooks[event]:
+            del self.hooks[event]
+
+        if not self.hooks and self._hooks_installed:
+            self._restore("execute", self._plain_execute)
+            self._restore("call_function", self._plain_call_function)
+            self._on_iteration = self._plain_on_iteration
+            self._hooks_installed = False
+
+    def _restore(self, name, method):
+        # A plain class method is restored by dropping the instance
+        # attribute: calls through it skip the bound-method object
+        if getattr(method, "__func__", None) is getattr(Interpreter, name):
+            delattr(self, name)
+        else:
+            setattr(self, name, method)
+
+    def _hooked_execute(self, node):
+        hooks = self.hooks
+
+        for fn in hooks.get("statement", ()):
+            fn(node, node.line, self.depth)
+
+        if isinstance(node, Import):
+            for fn in hooks.get("import", ()):
+                fn(node, node.line, self.depth)
+
+        try:
+            return self._plain_execute(node)
+        except RuntimeError as e:
+            # Report each error once, at the innermost statement
+            if e is not self._reported_error:
+                self._reported_error = e
+                for fn in hooks.get("error", ()):
+                    fn(node, e.line, self.depth, e)
+            raise
+        finally:
+            for fn in hooks.get("statement_end", ()):
+                fn(node, node.line, self.depth)
+
+    def _hooked_call_function(self, fn, args):
+        self.depth += 1
+
+        try:
+            for hook in self.hooks.get("call", ()):
+                hook(fn, fn.line, self.depth)
+
+            return self._plain_call_function(fn, args)
+        finally:
+            for hook in self.hooks.get("return", ()):
+                hook(fn, fn.line, self.depth)
+            self.depth -= 1
+
+    def _hooked_iteration(self, node):
+        if self._plain_on_iteration is not None:
+            self._plain_on_iteration(node)
+
+        for fn in self.hooks.get("loop", ()):
+            fn(node, node.line, self.depth)
+
     # =====================================================
     # STATEMENTS
     # =====================================================
@@ -104,7 +550,36 @@ class Interpreter:
                 self.unpack_tuple(node.target, value, node.line)
                 return
 
+            if isinstance(node.target, Index):
+                obj = self.evaluate(node.target.obj)
+                key = self.evaluate(node.target.index)
+                self.store_index(obj, key, value, node.line)
+                return
+
         if isinstance(node, CompoundAssign):
+            if isinstance(node.target, Index):
+                obj = self.evaluate(node.target.obj)
+                key = self.evaluate(node.target.index)
+                current = self.load_index(obj, key, node.line)
+                value = self.evaluate(node.value)
+
+                if node.op == "PLUSEQUAL":
+                    self.store_index(obj, key, current + value, node.line)
+
+                elif node.op == "MINUSEQUAL":
+                    self.store_index(obj, key, current - value, node.line)
+
+                elif node.op == "PLUSPLUSEQUAL":
+                    mutate(current, "update", value)
+
+                elif node.op == "MINUSMINUSEQUAL":
+                    mutate(current, "difference_update", value)
+
+                elif node.op == "TILDETILDEEQUAL":
+                    mutate(current, "symmetric_difference_update", value)
+
+                return
+
             current = self.scopes.get(node.target.name)
             value = self.evaluate(node.value)
 
@@ -115,13 +590,13 @@ class Interpreter:
                 self.scopes.set(node.target.name, current - value)
 
             elif node.op == "PLUSPLUSEQUAL":
-                current.update(value)
+                mutate(current, "update", value)
 
             elif node.op == "MINUSMINUSEQUAL":
-                current.difference_update(value)
+                mutate(current, "difference_update", value)
 
             elif node.op == "TILDETILDEEQUAL":
-                current.symmetric_difference_update(value)
+                mutate(current, "symmetric_difference_update", value)
 
             return
 
@@ -129,7 +604,7 @@ class Interpreter:
             values = [self.evaluate(v) for v in node.values]
             sep = self.evaluate(node.sep) if node.sep else " "
             end = self.evaluate(node.end) if node.end else "\n"
-            print(*values, sep=sep, end=end)
+            print(*values, sep=sep, end=end, file=self.stdout)
             return
 
         if isinstance(node, ExprStmt):
@@ -159,7 +634,11 @@ class Interpreter:
             return
 
         if isinstance(node, While):
+            on_iteration = self._on_iteration
+
             while self.evaluate(node.condition):
+                if on_iteration is not None:
+                    on_iteration(node)
                 try:
                     for stmt in node.body:
                         self.execute(stmt)
@@ -171,8 +650,11 @@ class Interpreter:
 
         if isinstance(node, ForEach):
             iterable = self.evaluate(node.iterable)
+            on_iteration = self._on_iteration
 
             for item in iterable:
+                if on_iteration is not None:
+                    on_iteration(node)
                 self.scopes.push()
                 self.scopes.set(node.var.name, item)
 
@@ -205,15 +687,8 @@ class Interpreter:
         if isinstance(node, Attribute):
             obj = self.evaluate(node.object)
 
-            if isinstance(obj, dict):
-                if node.name in obj:
-                    return obj[node.name]
-
-            raise RuntimeError(
-                f"Attribute '{node.name}' not found",
-                node.line
-            )
-
+            if isinstance(obj, LazyModule):
+                obj = obj.resolve(self._load_lazy)
 
             if isinstance(obj, dict):
                 if node.name in obj:
@@ -231,6 +706,17 @@ class Interpreter:
                 raise RuntimeError(f"Undefined variable '{node.name}'", node.line)
 
         if isinstance(node, BinaryOp):
+            op = node.op
+
+            # Short-circuit: the right operand is only evaluated when
+            # it decides the result
+            if op == "and":
+                left = self.evaluate(node.left)
+                return self.evaluate(node.right) if left else left
+            if op == "or":
+                left = self.evaluate(node.left)
+                return left if left else self.evaluate(node.right)
+
             left = self.evaluate(node.left)
             right = self.evaluate(node.right)
 
@@ -254,10 +740,24 @@ class Interpreter:
                 return left > right
             if node.op == "<":
                 return left < right
-            if node.op == "and":
-                return left and right
-            if node.op == "or":
-                return left or right
+
+        if isinstance(node, UnaryOp):
+            value = self.evaluate(node.operand)
+
+            if node.op == "not":
+                return not value
+            if node.op == "-":
+                try:
+                    return -value
+                except TypeError:
+                    raise RuntimeError(
+                        f"Cannot negate {type(value).__name__}", node.line
+                    )
+
+        if isinstance(node, Conditional):
+            if self.evaluate(node.condition):
+                return self.evaluate(node.then_expr)
+            return self.evaluate(node.else_expr)
 
         if isinstance(node, PostfixIncrement):
             val = self.scopes.get(node.variable.name)
@@ -272,14 +772,15 @@ class Interpreter:
         if isinstance(node, Call):
             func = self.evaluate(node.name)
             args = [self.evaluate(a) for a in node.args]
+            return self.call_value(func, args, node.line)
 
-            if callable(func):
-                return func(*args)
+        if isinstance(node, Index):
+            obj = self.evaluate(node.obj)
 
-            if isinstance(func, FunctionDef):
-                return self.call_function(func, args)
+            if isinstance(node.index, Slice):
+                return self.slice_value(obj, node.index)
 
-            raise RuntimeError("Invalid function call", node.line)
+            return self.load_index(obj, self.evaluate(node.index), node.line)
 
         if isinstance(node, AttributeAccess):
             obj = self.evaluate(node.obj)
@@ -318,6 +819,25 @@ class Interpreter:
     # FUNCTION CALL
     # =====================================================
 
+    def call_value(self, func, args, line):
+        if callable(func):
+            return self.call_native(func, args, line)
+
+        if isinstance(func, FunctionDef):
+            return self.call_function(func, args)
+
+        raise RuntimeError("Invalid function call", line)
+
+    def call_native(self, func, args, line):
+        # Native builtins and modules report Python errors as Quirk
+        # runtime errors at the call site; AttributeError is a value
+        # of the wrong kind, e.g. popleft on a list
+        try:
+            return func(*args)
+        except (ArithmeticError, AttributeError, LookupError, TypeError,
+                ValueError) as e:
+            raise RuntimeError(str(e), line)
+
     def call_function(self, fn, args):
 
         if len(args) != len(fn.params):
@@ -338,6 +858,60 @@ class Interpreter:
         self.scopes.pop()
         return None
 
+    # =====================================================
+    # INDEXING
+    # =====================================================
+
+    def load_index(self, obj, key, line):
+        if isinstance(obj, LazyModule):
+            obj = obj.resolve(self._load_lazy)
+
+        try:
+            return obj[key]
+        except IndexError:
+            raise RuntimeError(f"Index {key!r} out of range", line)
+        except KeyError:
+            raise RuntimeError(f"Key {key!r} not found", line)
+        except TypeError:
+            raise RuntimeError(
+                f"Cannot index {type(obj).__name__} with {type(key).__name__}",
+                line
+            )
+
+    def store_index(self, obj, key, value, line):
+        if isinstance(obj, LazyModule):
+            obj = obj.resolve(self._load_lazy)
+
+        if isinstance(obj, (str, tuple)):
+            raise RuntimeError(
+                f"Cannot assign into immutable {type(obj).__name__}",
+                line
+            )
+
+        try:
+            set_item(obj, key, value)
+        except IndexError:
+            raise RuntimeError(f"Index {key!r} out of range", line)
+        except TypeError:
+            raise RuntimeError(
+                f"Cannot index {type(obj).__name__} with {type(key).__name__}",
+                line
+            )
+
+    def slice_value(self, obj, node):
+        bounds = [
+            self.evaluate(part) if part is not None else None
+            for part in (node.start, node.stop, node.step)
+        ]
+
+        if isinstance(obj, (dict, set)):
+            raise RuntimeError(f"Cannot slice {type(obj).__name__}", node.line)
+
+        try:
+            return make_slice(obj, *bounds)
+        except (TypeError, ValueError) as e:
+            raise RuntimeError(f"Invalid slice: {e}", node.line)
+
     # =====================================================
     # TUPLE UNPACK
     # =====================================================
@@ -358,40 +932,106 @@ class Interpreter:
     
 
     def load_module(self, name, line):
+        native = native_module(name)
 
-        MODULE_PATHS = [
-                    ".",
-                    "lang",
-        ]
+        if native is not None and not is_deterministic(name):
+            self.mark_uncacheable()
 
-        if name in self.modules:
-            self.scopes.set(name, self.modules[name])
+        filename = self.resolver(name)
+
+        if not filename:
+            if native is None:
+                # Creating the file later would change the result
+                self.mark_uncacheable()
+                raise RuntimeError(f"Module '{name}' not found", line)
+
+            module_dict = dict(native)
+            self.modules[name] = module_dict
+            self.scopes.set(name, module_dict)
             return
 
-        filename = None
+        if not self.eager_imports:
+            self.scopes.set(
+                name, LazyModule(name, filename, line)
+            )
+            return
 
-        for base in MODULE_PATHS:
-            path = os.path.join(base, f"{name}.sl")
-            if os.path.exists(path):
-                filename = path
-                break
+        # Bind a copy so programs sharing a cached module cannot rebind
+        # its names or change its data for one another
+        try:
+            module_dict = isolate(self._load_namespace(filename))
+        except CircularImportError:
+            raise RuntimeError(f"Circular import of module '{name}'", line)
 
-        if not filename:
-            raise RuntimeError(f"Module '{name}' not found", line)
+        self.modules[name] = module_dict
+        self.module_files[name] = filename
+        self.scopes.set(name, module_dict)
 
-        with open(filename, "r") as f:
-            code = f.read()
+    def _load_lazy(self, module):
+        try:
+            module_dict = isolate(self._load_namespace(module.path))
+        except CircularImportError:
+            raise RuntimeError(
+                f"Circular import of module '{module.name}'", module.line
+            )
+        except (QuirkSyntaxError, RuntimeError) as e:
+            raise RuntimeError(
+                f"Error importing module '{module.name}': {e}", module.line
+            )
 
-        tokens = tokenize(code)
-        ast = Parser(tokens).parse()
+        self.modules[module.name] = module_dict
+        self.module_files[module.name] = module.path
+        return module_dict
 
-        module_interpreter = Interpreter()
-        module_interpreter.run(ast)
+    def _load_namespace(self, filename):
+        wall = time.perf_counter()
+        cpu = time.process_time()
 
-        module_dict = {}
+        try:
+            namespace = self.registry.load(filename, self._execute_module)
+            self.module_stamps.update(self.registry.stamps(filename))
+            return namespace
+        finally:
+            self.import_wall += time.perf_counter() - wall
+            self.import_cpu += time.process_time() - cpu
+
+    def _execute_module(self, filename):
+        ast = self.registry.get_ast(filename)
+
+        if ast is None:
+            with open(filename, "r") as f:
+                code = f.read()
+
+            tokens = tokenize(code)
+            ast = Parser(tokens).parse()
+
+        # Lets profilers tell the module's lines from the program's
+        for node in walk(ast):
+            if type(node) is FunctionDef:
+                node.file = filename
+
+        # Module code runs under the importing program's limits, and
+        # its steps count towards the program's budget
+        module_interpreter = Interpreter(
+            eager_imports=self.eager_imports,
+            max_steps=self.max_steps,
+            max_memory=self.max_memory,
+            stdout=self.stdout,
+            resolver=self.resolver,
+            registry=self.registry,
+        )
+        module_interpreter.steps = self.steps
+        try:
+            module_interpreter.run(ast)
+        finally:
+            self.steps = module_interpreter.steps
+        self.registry.record_dependencies(
+            filename, module_interpreter.module_stamps
+        )
+
+        # A .sl file named after a native module overrides its names
+        name = os.path.splitext(os.path.basename(filename))[0]
+        module_dict = dict(native_module(name) or {})
         module_dict.update(module_interpreter.functions)
         module_dict.update(module_interpreter.scopes.scopes[0])
-
-        self.modules[name] = module_dict
-        self.scopes.set(name, module_dict)
-
+        return module_dict
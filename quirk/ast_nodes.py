@@ -5,6 +5,13 @@
 # =========================================================
 
 class Node:
+    # Set by the parser on names, imports and break/continue, for
+    # diagnostics
+    column = None
+    # Handler installed by adaptive interpreters (quirk/quicken.py);
+    # other interpreters ignore it
+    quick = None
+
     def __init__(self, line):
         self.line = line
 
@@ -76,6 +83,9 @@ class ForEach(Node):
 
 
 class FunctionDef(Node):
+    # Path of the module that defines it; None in the main program
+    file = None
+
     def __init__(self, name, params, body, line):
         super().__init__(line)
         self.name = name
@@ -146,6 +156,14 @@ class UnaryOp(Node):
         self.operand = operand
 
 
+class Conditional(Node):
+    def __init__(self, condition, then_expr, else_expr, line):
+        super().__init__(line)
+        self.condition = condition
+        self.then_expr = then_expr
+        self.else_expr = else_expr
+
+
 class ListLiteral(Node):
     def __init__(self, elements, line):
         super().__init__(line)
@@ -177,6 +195,14 @@ class Index(Node):
         self.index = index
 
 
+class Slice(Node):
+    def __init__(self, start, stop, step, line):
+        super().__init__(line)
+        self.start = start
+        self.stop = stop
+        self.step = step
+
+
 class Call(Node):
     def __init__(self, name, args, line):
         super().__init__(line)
@@ -209,7 +235,31 @@ class TuplePattern(Node):
         self.elements = elements
 
 class Attribute:
+    quick = None
+
     def __init__(self, object_, name, line):
         self.object = object_
         self.name = name
         self.line = line
+
+
+# =========================================================
+# TRAVERSAL
+# =========================================================
+
+def walk(node):
+    """Yield ``node`` and every AST node reachable from it."""
+    stack = [node]
+
+    while stack:
+        current = stack.pop()
+
+        if isinstance(current, (list, tuple)):
+            stack.extend(current)
+            continue
+
+        if not isinstance(current, (Node, Attribute)):
+            continue
+
+        yield current
+        stack.extend(vars(current).values())
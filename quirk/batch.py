@@ -0,0 +1,76 @@
+# quirk/batch.py
+
+import json
+import multiprocessing
+import sys
+
+from quirk.runner import run_source
+
+
+# =========================================================
+# BATCH RUNNER
+# Reads JSONL records of {id, code, max_steps} and writes one
+# JSON result per line, in input order, as soon as it is ready.
+# =========================================================
+
+def _input_error(message):
+    return {
+        "id": None,
+        "status": "internal_error",
+        "output": "",
+        "error": message,
+        "line": None,
+    }
+
+
+def run_record(numbered_line):
+    number, line = numbered_line
+
+    try:
+        record = json.loads(line)
+    except ValueError as e:
+        return _input_error(f"Invalid JSON on input line {number}: {e}")
+
+    if not isinstance(record, dict):
+        return _input_error(f"Input line {number} is not a JSON object")
+
+    result = run_source(
+        record.get("code", ""),
+        max_steps=record.get("max_steps"),
+    )
+    result["id"] = record.get("id")
+    return result
+
+
+def read_lines(stream):
+    for number, line in enumerate(stream, start=1):
+        if line.strip():
+            yield number, line
+
+
+def run_batch(stream, out, jobs=1):
+    lines = read_lines(stream)
+
+    if jobs > 1:
+        with multiprocessing.Pool(jobs) as pool:
+            for result in pool.imap(run_record, lines, chunksize=8):
+                out.write(json.dumps(result) + "\n")
+                out.flush()
+        return
+
+    for numbered_line in lines:
+        out.write(json.dumps(run_record(numbered_line)) + "\n")
+        out.flush()
+
+
+def batch(path, jobs=1, output=None):
+    source = sys.stdin if path == "-" else open(path, "r")
+    out = open(output, "w") if output else sys.stdout
+
+    try:
+        run_batch(source, out, jobs=jobs)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
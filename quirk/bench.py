@@ -0,0 +1,211 @@
+# quirk/bench.py
+
+import glob
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+from quirk.ast_interpreter import Interpreter
+from quirk.lexer import tokenize
+from quirk.modules import module_paths, path_resolver, registry
+from quirk.parser import Parser
+
+
+BENCH_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "bench")
+FORMAT_VERSION = 1
+PHASES = ("tokenize", "parse", "execute", "total")
+
+
+# =========================================================
+# CORPUS
+# =========================================================
+
+def generate_large_source(functions=200, statements=40):
+    """Large synthetic program for lexer and parser stress."""
+    lines = []
+
+    for f in range(functions):
+        lines.append(f"function f{f}(a, b)")
+        for s in range(statements):
+            lines.append(f"    v{s} = a * {s} + b - {s} # comment {s}")
+        lines.append(f'    label = "function {f}"')
+        lines.append(f"    data = [a, b, {f}, {{\"k\": {f}}}, (1, 2)]")
+        lines.append("    return v0")
+        lines.append("end")
+
+    lines.append("total = 0")
+    for f in range(functions):
+        lines.append(f"total += f{f}({f}, 1)")
+    lines.append("print total")
+
+    return "\n".join(lines) + "\n"
+
+
+def load_corpus(paths=None):
+    if not paths:
+        paths = sorted(glob.glob(os.path.join(BENCH_DIR, "*.qk")))
+        programs = [(os.path.basename(p)[:-3], _read(p)) for p in paths]
+        programs.append(("generated_large", generate_large_source()))
+        return programs
+
+    return [(os.path.splitext(os.path.basename(p))[0], _read(p)) for p in paths]
+
+
+def _read(path):
+    with open(path, "r") as f:
+        return f.read()
+
+
+# =========================================================
+# MEASUREMENT
+# =========================================================
+
+def run_once(code, resolver=None):
+    registry.clear()
+    timings = {}
+
+    start = time.perf_counter()
+    tokens = tokenize(code)
+    timings["tokenize"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    ast = Parser(tokens).parse()
+    timings["parse"] = time.perf_counter() - start
+
+    interpreter = Interpreter(stdout=io.StringIO(), resolver=resolver)
+    start = time.perf_counter()
+    interpreter.run(ast)
+    timings["execute"] = time.perf_counter() - start
+
+    timings["total"] = sum(timings.values())
+    return timings, len(tokens)
+
+
+def peak_memory(code, resolver=None):
+    registry.clear()
+    tracemalloc.start()
+
+    try:
+        interpreter = Interpreter(stdout=io.StringIO(), resolver=resolver)
+        interpreter.run(Parser(tokenize(code)).parse())
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def summarize(samples):
+    return {
+        "median": statistics.median(samples),
+        "stddev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "min": min(samples),
+    }
+
+
+def bench_program(code, repeat=5, warmup=1, resolver=None):
+    for _ in range(warmup):
+        run_once(code, resolver)
+
+    samples = {phase: [] for phase in PHASES}
+    tokens = 0
+    for _ in range(repeat):
+        timings, tokens = run_once(code, resolver)
+        for phase in PHASES:
+            samples[phase].append(timings[phase])
+
+    result = {phase: summarize(samples[phase]) for phase in PHASES}
+    result["tokens"] = tokens
+    result["peak_memory"] = peak_memory(code, resolver)
+    return result
+
+
+def run_benchmarks(paths=None, repeat=5, warmup=1, out=sys.stderr):
+    # Let the corpus import its helper modules
+    resolver = path_resolver([BENCH_DIR, *module_paths()])
+
+    results = {}
+    for name, code in load_corpus(paths):
+        print(f"  {name} ...", file=out, flush=True)
+        results[name] = bench_program(
+            code, repeat=repeat, warmup=warmup, resolver=resolver
+        )
+
+    return {
+        "format": FORMAT_VERSION,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "repeat": repeat,
+        "warmup": warmup,
+        "benchmarks": results,
+    }
+
+
+# =========================================================
+# REPORTS
+# =========================================================
+
+def format_results(data):
+    out = [
+        f"{'benchmark':<20} " + " ".join(f"{p + ' ms':>12}" for p in PHASES)
+        + f" {'stddev ms':>10} {'peak KiB':>10}"
+    ]
+
+    for name, result in sorted(data["benchmarks"].items()):
+        medians = " ".join(
+            f"{result[p]['median'] * 1000:>12.3f}" for p in PHASES
+        )
+        out.append(
+            f"{name:<20} {medians} "
+            f"{result['total']['stddev'] * 1000:>10.3f} "
+            f"{result['peak_memory'] / 1024:>10.1f}"
+        )
+
+    return "\n".join(out)
+
+
+def compare_results(base, new):
+    out = [
+        f"{'benchmark':<20} {'phase':<9} {'base ms':>10} {'new ms':>10} "
+        f"{'change':>9}"
+    ]
+
+    for name in sorted(set(base["benchmarks"]) & set(new["benchmarks"])):
+        for phase in PHASES:
+            old = base["benchmarks"][name][phase]["median"]
+            cur = new["benchmarks"][name][phase]["median"]
+            change = (cur / old - 1) * 100 if old else 0.0
+            out.append(
+                f"{name:<20} {phase:<9} {old * 1000:>10.3f} "
+                f"{cur * 1000:>10.3f} {change:>+8.1f}%"
+            )
+
+    return "\n".join(out)
+
+
+def bench(paths=None, repeat=5, warmup=1, json_path=None, compare=None,
+          baseline=None):
+    """Run the corpus, or with ``compare`` (BASE, NEW) only compare two
+    saved results. ``baseline`` compares this run against a saved one."""
+    if compare:
+        with open(compare[0]) as f:
+            base = json.load(f)
+        with open(compare[1]) as f:
+            new = json.load(f)
+        print(compare_results(base, new))
+        return
+
+    data = run_benchmarks(paths, repeat=repeat, warmup=warmup)
+
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump(data, f, indent=2)
+
+    if baseline:
+        with open(baseline) as f:
+            print(compare_results(json.load(f), data))
+    else:
+        print(format_results(data))
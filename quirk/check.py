@@ -0,0 +1,256 @@
+# quirk/check.py
+
+import inspect
+import json
+import sys
+
+from quirk.ast_interpreter import BUILTINS
+from quirk.ast_nodes import *
+from quirk.lexer import tokenize
+from quirk.modules import find_module
+from quirk.parser import Parser, QuirkSyntaxError
+from quirk.stdlib import native_module
+
+
+# =========================================================
+# DIAGNOSTICS
+# Lex and parse only, then look for mistakes that would
+# surely fail at run time. Nothing is executed and no
+# module is loaded beyond the native ones.
+# =========================================================
+
+def diagnostic(code, message, line, column=None, severity="error"):
+    return {
+        "severity": severity,
+        "code": code,
+        "message": message,
+        "line": line,
+        "column": column,
+    }
+
+
+def check_source(code):
+    """List of diagnostics for ``code``, syntax errors first."""
+    try:
+        program = Parser(tokenize(code)).parse()
+    except QuirkSyntaxError as e:
+        return [diagnostic("syntax", e.message, e.line, e.column)]
+
+    checker = Checker(program)
+    checker.run()
+    return sorted(
+        checker.diagnostics,
+        key=lambda d: (d["line"] or 0, d["column"] or 0)
+    )
+
+
+def _arity(fn):
+    """inspect.Signature of a native callable, or None if unknown."""
+    try:
+        return inspect.signature(fn)
+    except (TypeError, ValueError):
+        return None
+
+
+def _accepts(signature, count):
+    try:
+        signature.bind(*([None] * count))
+        return True
+    except TypeError:
+        return False
+
+
+class Checker:
+    def __init__(self, program):
+        self.program = program
+        self.diagnostics = []
+
+        # Scopes are dynamic at run time (callees see their caller's
+        # locals), so a name is only undefined if nothing binds it
+        self.bound = set(BUILTINS)
+        self.functions = {}
+        self.assigned = set()
+        # Imported native modules not overridden by a .sl file
+        self.natives = {}
+        self._collect(program)
+
+    def run(self):
+        self._block(self.program.statements, loop=False, function=False)
+
+        for node in walk(self.program):
+            if isinstance(node, Variable):
+                self._name(node)
+            elif isinstance(node, Call):
+                self._call(node)
+
+    # -----------------------------------------------------
+    # Bindings
+    # -----------------------------------------------------
+
+    def _collect(self, program):
+        arities = {}
+
+        for node in walk(program):
+            if isinstance(node, (Assign, CompoundAssign)):
+                self._bind_target(node.target)
+
+            elif isinstance(node, ForEach):
+                self.bound.add(node.var.name)
+
+            elif isinstance(node, FunctionDef):
+                self.bound.add(node.name)
+                self.bound.update(
+                    p.name for p in node.params if isinstance(p, Variable)
+                )
+                arities.setdefault(node.name, set()).add(len(node.params))
+                self.functions[node.name] = node
+
+            elif isinstance(node, Import):
+                self._import(node)
+
+        # Only check calls to functions defined exactly one way and
+        # never rebound
+        for name, counts in arities.items():
+            if len(counts) != 1 or name in self.assigned:
+                del self.functions[name]
+
+    def _import(self, node):
+        name = node.module_name
+        self.bound.add(name)
+
+        if name in self.natives or find_module(name) is not None:
+            return
+
+        namespace = native_module(name)
+        if namespace is None:
+            self.diagnostics.append(diagnostic(
+                "module-not-found", f"Module '{name}' not found",
+                node.line, node.column
+            ))
+        else:
+            self.natives[name] = namespace
+
+    def _bind_target(self, target):
+        if isinstance(target, Variable):
+            self.bound.add(target.name)
+            self.assigned.add(target.name)
+        elif isinstance(target, TuplePattern):
+            for element in target.elements:
+                self._bind_target(element)
+
+    # -----------------------------------------------------
+    # Checks
+    # -----------------------------------------------------
+
+    def _name(self, node):
+        if node.column is not None and node.name not in self.bound:
+            self.diagnostics.append(diagnostic(
+                "undefined-name",
+                f"Undefined variable '{node.name}'",
+                node.line, node.column
+            ))
+
+    def _call(self, node):
+        count = len(node.args)
+        callee = node.name
+
+        if isinstance(callee, Variable):
+            fn = self.functions.get(callee.name)
+            if fn is not None:
+                if count != len(fn.params):
+                    self._arity_error(node, callee.name, len(fn.params))
+                return
+
+            builtin = BUILTINS.get(callee.name)
+            if builtin is not None:
+                self._check_native(node, callee.name, builtin)
+            return
+
+        # module.function(...) on a native module without a .sl override
+        if (isinstance(callee, Attribute)
+                and isinstance(callee.object, Variable)
+                and callee.object.name in self.natives):
+            fn = self.natives[callee.object.name].get(callee.name)
+
+            if fn is None:
+                self.diagnostics.append(diagnostic(
+                    "undefined-name",
+                    f"Module '{callee.object.name}' has no "
+                    f"attribute '{callee.name}'",
+                    node.line, callee.object.column
+                ))
+            elif callable(fn):
+                self._check_native(
+                    node, f"{callee.object.name}.{callee.name}", fn
+                )
+
+    def _check_native(self, node, name, fn):
+        signature = _arity(fn)
+        if signature is not None and not _accepts(signature, len(node.args)):
+            self.diagnostics.append(diagnostic(
+                "arity",
+                f"Wrong number of arguments for '{name}' "
+                f"({len(node.args)} given)",
+                node.line, _column(node)
+            ))
+
+    def _arity_error(self, node, name, expected):
+        self.diagnostics.append(diagnostic(
+            "arity",
+            f"'{name}' takes {expected} argument"
+            f"{'' if expected == 1 else 's'}, {len(node.args)} given",
+            node.line, _column(node)
+        ))
+
+    def _block(self, statements, loop, function):
+        for stmt in statements or ():
+            self._statement(stmt, loop, function)
+
+    def _statement(self, node, loop, function):
+        if isinstance(node, (Break, Continue)) and not loop:
+            keyword = "break" if isinstance(node, Break) else "continue"
+
+            if function:
+                # Escapes the call into the caller's loop, if any
+                self.diagnostics.append(diagnostic(
+                    "outside-loop",
+                    f"'{keyword}' outside a loop in this function",
+                    node.line, node.column, severity="warning"
+                ))
+            else:
+                self.diagnostics.append(diagnostic(
+                    "outside-loop", f"'{keyword}' outside a loop",
+                    node.line, node.column
+                ))
+
+        elif isinstance(node, (While, ForEach)):
+            self._block(node.body, True, function)
+
+        elif isinstance(node, If):
+            self._block(node.then_body, loop, function)
+            self._block(node.else_body, loop, function)
+
+        elif isinstance(node, FunctionDef):
+            self._block(node.body, False, True)
+
+
+def _column(call):
+    callee = call.name
+    while isinstance(callee, Attribute):
+        callee = callee.object
+    return getattr(callee, "column", None)
+
+
+def check_file(path, out=sys.stdout):
+    """Print diagnostics for ``path`` as JSON; returns the exit status."""
+    if path == "-":
+        code = sys.stdin.read()
+    else:
+        with open(path, "r") as f:
+            code = f.read()
+
+    diagnostics = check_source(code)
+    json.dump({"file": path, "diagnostics": diagnostics}, out, indent=2)
+    out.write("\n")
+
+    return 1 if any(d["severity"] == "error" for d in diagnostics) else 0
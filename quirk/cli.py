@@ -1,10 +1,13 @@
 # quirk/cli.py
 
 import argparse
+import json
+import mmap
+import os
 import sys
 
-from quirk.lexer import tokenize
-from quirk.parser import Parser
+from quirk.lexer import iter_tokens, tokenize
+from quirk.parser import Parser, StreamParser
 from quirk.parser import QuirkSyntaxError
 from quirk.ast_interpreter import Interpreter, RuntimeError
 
@@ -12,6 +15,10 @@ from quirk.ast_interpreter import Interpreter, RuntimeError
 BLOCK_STARTERS = ("if", "while", "for", "function")
 
 
+def megabytes(value):
+    return value * 1024 * 1024 if value else None
+
+
 def run_code(code, interpreter):
     try:
         tokens = tokenize(code)
@@ -28,9 +35,56 @@ def run_code(code, interpreter):
         print("Internal Error: Unexpected failure.")
 
 
-def repl():
+def run_stream(path, interpreter):
+    """Execute each top-level statement as soon as it has been parsed.
+
+    The file is mmapped and lexed lazily; finished statements are
+    dropped, so memory is bounded by the largest single statement.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as source:
+            try:
+                for stmt in StreamParser(iter_tokens(source)).statements():
+                    interpreter.execute(stmt)
+
+            except QuirkSyntaxError as e:
+                print(str(e))
+
+            except RuntimeError as e:
+                print(str(e))
+
+            except Exception:
+                print("Internal Error: Unexpected failure.")
+
+
+def load_snapshot_or_exit(interpreter, path):
+    from quirk.snapshot import SnapshotError
+
+    try:
+        interpreter.restore(path)
+    except (OSError, SnapshotError) as e:
+        print(f"Snapshot Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+def save_snapshot_or_warn(interpreter, path):
+    from quirk.snapshot import SnapshotError
+
+    try:
+        interpreter.snapshot(path)
+    except (OSError, SnapshotError) as e:
+        print(f"Snapshot Error: {e}", file=sys.stderr)
+
+
+def repl(eager_imports=False, restore=None, save_snapshot=None):
     print("Quirk REPL — type 'exit' to quit")
-    interpreter = Interpreter()
+    interpreter = Interpreter(eager_imports=eager_imports)
+
+    if restore:
+        load_snapshot_or_exit(interpreter, restore)
 
     buffer = []
     open_blocks = 0
@@ -44,6 +98,8 @@ def repl():
                 continue
 
             if line.strip() == "exit" and open_blocks == 0:
+                if save_snapshot:
+                    save_snapshot_or_warn(interpreter, save_snapshot)
                 break
 
             buffer.append(line)
@@ -77,12 +133,61 @@ def repl():
             open_blocks = 0
 
 
-def run_file(path):
+def run_file(path, eager_imports=False, max_steps=None,
+             timings=False, memstats=False, stats_json=False,
+             from_snapshot=None, save_snapshot=None, stream=False,
+             preload_imports=False, import_jobs=None, max_memory=None,
+             adaptive=False):
+    interpreter = Interpreter(
+        eager_imports=eager_imports,
+        adaptive=adaptive,
+        max_steps=max_steps,
+        max_memory=max_memory,
+        preload_imports=preload_imports,
+        import_jobs=import_jobs,
+    )
+
+    if from_snapshot:
+        load_snapshot_or_exit(interpreter, from_snapshot)
+
+    if stream:
+        run_stream(path, interpreter)
+        if save_snapshot:
+            save_snapshot_or_warn(interpreter, save_snapshot)
+        return
+
     with open(path, "r") as f:
         code = f.read()
 
-    interpreter = Interpreter()
-    run_code(code, interpreter)
+    if timings or memstats or stats_json:
+        run_with_stats(code, interpreter, timings, memstats, stats_json)
+    else:
+        run_code(code, interpreter)
+
+    if save_snapshot:
+        save_snapshot_or_warn(interpreter, save_snapshot)
+
+
+def run_with_stats(code, interpreter, timings, memstats, stats_json):
+    from quirk.runner import format_stats, run_source
+
+    result = run_source(
+        code,
+        interpreter,
+        stdout=sys.stdout,
+        stats=timings or stats_json,
+        memstats=memstats,
+    )
+
+    if result["error"]:
+        print(result["error"])
+
+    sys.stdout.flush()
+
+    if stats_json:
+        print(json.dumps(result["stats"]), file=sys.stderr)
+    else:
+        print(format_stats(result["stats"]), file=sys.stderr)
 
 
 def main():
@@ -95,16 +200,268 @@ def main():
 
     run_cmd = sub.add_parser("run")
     run_cmd.add_argument("file")
+    run_cmd.add_argument(
+        "--eager-imports", action="store_true",
+        help="load modules at the import statement instead of on first use"
+    )
+    run_cmd.add_argument(
+        "--preload-imports", action="store_true",
+        help="parse all transitively imported modules in parallel before "
+             "running, rejecting import cycles up front"
+    )
+    run_cmd.add_argument(
+        "--import-jobs", type=int, default=None,
+        help="worker processes for --preload-imports (default: CPU count)"
+    )
+    run_cmd.add_argument(
+        "--max-steps", type=int, default=None,
+        help="abort after executing this many statements and loop iterations"
+    )
+    run_cmd.add_argument(
+        "--max-memory", type=int, default=None, metavar="MB",
+        help="abort once the program's values take more than this many MB"
+    )
+    run_cmd.add_argument(
+        "--adaptive", action="store_true",
+        help="specialize hot operators, assignments and calls to the "
+             "types they see (hit rate is shown with --timings)"
+    )
+    run_cmd.add_argument(
+        "--timings", action="store_true",
+        help="print lex, parse, import and execute wall/CPU time to stderr"
+    )
+    run_cmd.add_argument(
+        "--memstats", action="store_true",
+        help="print peak memory, token/AST counts and max call depth"
+    )
+    run_cmd.add_argument(
+        "--stats-json", action="store_true",
+        help="print the requested stats to stderr as one JSON object"
+    )
+    run_cmd.add_argument(
+        "--stream", action="store_true",
+        help="mmap and lex the file lazily, running each top-level "
+             "statement as soon as it is parsed"
+    )
+    run_cmd.add_argument(
+        "--from-snapshot", metavar="PATH",
+        help="restore interpreter state from a snapshot before running"
+    )
+    run_cmd.add_argument(
+        "--save-snapshot", metavar="PATH",
+        help="write interpreter state to a snapshot after running"
+    )
 
     repl_cmd = sub.add_parser("repl")
+    repl_cmd.add_argument(
+        "--eager-imports", action="store_true",
+        help="load modules at the import statement instead of on first use"
+    )
+    repl_cmd.add_argument(
+        "--restore", metavar="PATH",
+        help="start from the state saved in a snapshot"
+    )
+    repl_cmd.add_argument(
+        "--save-snapshot", metavar="PATH",
+        help="write interpreter state to a snapshot on exit"
+    )
+
+    check_cmd = sub.add_parser("check")
+    check_cmd.add_argument(
+        "file",
+        help="program to lex, parse and check without running ('-' for stdin)"
+    )
+
+    profile_cmd = sub.add_parser("profile")
+    profile_cmd.add_argument("file")
+    profile_cmd.add_argument(
+        "--collapsed",
+        help="write flamegraph-compatible collapsed stacks to this file"
+    )
+    profile_cmd.add_argument(
+        "--sort", choices=("exclusive", "inclusive", "hits"),
+        default="exclusive",
+        help="column to sort the per-line table by"
+    )
+    profile_cmd.add_argument(
+        "--limit", type=int, default=None,
+        help="show only the top N rows"
+    )
+    profile_cmd.add_argument("--max-steps", type=int, default=None)
+
+    bench_cmd = sub.add_parser("bench")
+    bench_cmd.add_argument(
+        "programs", nargs="*",
+        help="programs to time (default: the bench/ corpus)"
+    )
+    bench_cmd.add_argument("--repeat", type=int, default=5)
+    bench_cmd.add_argument("--warmup", type=int, default=1)
+    bench_cmd.add_argument("--json", help="write results to this file")
+    bench_cmd.add_argument(
+        "--compare", nargs=2, metavar=("BASE", "NEW"),
+        help="compare two saved results instead of running"
+    )
+    bench_cmd.add_argument(
+        "--baseline", metavar="BASE",
+        help="compare this run against saved results"
+    )
+
+    batch_cmd = sub.add_parser("batch")
+    batch_cmd.add_argument(
+        "input",
+        help="JSONL file of {id, code, max_steps} records ('-' for stdin)"
+    )
+    batch_cmd.add_argument(
+        "--jobs", type=int, default=1,
+        help="number of worker processes"
+    )
+    batch_cmd.add_argument(
+        "--output", "-o",
+        help="write results here instead of stdout"
+    )
+
+    serve_cmd = sub.add_parser("serve")
+    serve_cmd.add_argument(
+        "--socket",
+        help="listen on this Unix socket instead of stdin/stdout"
+    )
+    serve_cmd.add_argument(
+        "--max-jobs", type=int, default=0,
+        help="exit after this many programs (0 = never)"
+    )
+    serve_cmd.add_argument(
+        "--max-memory-mb", type=int, default=0,
+        help="exit once peak RSS exceeds this many MB (0 = never)"
+    )
+    serve_cmd.add_argument(
+        "--max-steps", type=int, default=None,
+        help="default step budget for jobs that do not set max_steps"
+    )
+    serve_cmd.add_argument(
+        "--max-memory", type=int, default=None, metavar="MB",
+        help="default memory budget for jobs that do not set max_memory"
+    )
+    serve_cmd.add_argument(
+        "--rlimit-as-mb", type=int, default=0,
+        help="hard RLIMIT_AS for the worker process in MB (0 = none)"
+    )
+
+    zygote_cmd = sub.add_parser("zygote")
+    zygote_cmd.add_argument(
+        "--socket",
+        help="listen on this Unix socket instead of stdin/stdout"
+    )
+    zygote_cmd.add_argument(
+        "--preload", action="append", default=[], metavar="MODULE",
+        help="module to load before forking (repeatable, or comma-separated)"
+    )
+    zygote_cmd.add_argument("--max-steps", type=int, default=None)
+    zygote_cmd.add_argument(
+        "--max-memory", type=int, default=None, metavar="MB",
+        help="default memory budget for jobs that do not set max_memory"
+    )
+    zygote_cmd.add_argument(
+        "--cpu-seconds", type=int, default=5,
+        help="RLIMIT_CPU for each child (0 = unlimited)"
+    )
+    zygote_cmd.add_argument(
+        "--memory-mb", type=int, default=256,
+        help="RLIMIT_AS for each child in MB (0 = unlimited)"
+    )
+    zygote_cmd.add_argument(
+        "--timeout", type=float, default=10.0,
+        help="wall-clock seconds before a child is killed"
+    )
 
     args = parser.parse_args()
 
     if args.command == "run":
-        run_file(args.file)
+        if args.stream and (args.timings or args.memstats or args.stats_json):
+            parser.error("--stream cannot be combined with stats options")
+        if args.stream and args.preload_imports:
+            parser.error("--stream cannot be combined with --preload-imports")
+
+        run_file(
+            args.file,
+            eager_imports=args.eager_imports,
+            max_steps=args.max_steps,
+            timings=args.timings,
+            memstats=args.memstats,
+            stats_json=args.stats_json,
+            from_snapshot=args.from_snapshot,
+            save_snapshot=args.save_snapshot,
+            stream=args.stream,
+            preload_imports=args.preload_imports,
+            import_jobs=args.import_jobs,
+            max_memory=megabytes(args.max_memory),
+            adaptive=args.adaptive,
+        )
 
     elif args.command == "repl":
-        repl()
+        repl(
+            eager_imports=args.eager_imports,
+            restore=args.restore,
+            save_snapshot=args.save_snapshot,
+        )
+
+    elif args.command == "check":
+        from quirk.check import check_file
+        sys.exit(check_file(args.file))
+
+    elif args.command == "profile":
+        from quirk.profiler import profile_file
+        profile_file(
+            args.file,
+            collapsed=args.collapsed,
+            sort=args.sort,
+            limit=args.limit,
+            max_steps=args.max_steps,
+        )
+
+    elif args.command == "bench":
+        if args.compare and (args.programs or args.baseline or args.json):
+            parser.error("--compare only compares two saved results")
+
+        from quirk.bench import bench
+        bench(
+            paths=args.programs,
+            repeat=args.repeat,
+            warmup=args.warmup,
+            json_path=args.json,
+            compare=args.compare,
+            baseline=args.baseline,
+        )
+
+    elif args.command == "batch":
+        from quirk.batch import batch
+        batch(args.input, jobs=args.jobs, output=args.output)
+
+    elif args.command == "serve":
+        from quirk.serve import serve
+        serve(
+            socket_path=args.socket,
+            max_jobs=args.max_jobs,
+            max_memory_mb=args.max_memory_mb,
+            max_steps=args.max_steps,
+            max_memory=megabytes(args.max_memory),
+            rlimit_as_mb=args.rlimit_as_mb,
+        )
+
+    elif args.command == "zygote":
+        from quirk.zygote import zygote
+        zygote(
+            socket_path=args.socket,
+            preload=[
+                name
+                for group in args.preload
+                for name in group.split(",") if name
+            ],
+            max_steps=args.max_steps,
+            cpu_seconds=args.cpu_seconds,
+            memory_mb=args.memory_mb,
+            timeout=args.timeout,
+            max_memory=megabytes(args.max_memory),
+        )
 
     else:
         parser.print_help()
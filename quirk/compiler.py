@@ -69,9 +69,20 @@ class Compiler:
             return node.name
         if isinstance(node, BinaryOp):
             return f"({self.emit_expr(node.left)} {node.op} {self.emit_expr(node.right)})"
+        if isinstance(node, UnaryOp):
+            return f"({node.op} {self.emit_expr(node.operand)})"
+        if isinstance(node, Conditional):
+            return (
+                f"({self.emit_expr(node.then_expr)} if "
+                f"{self.emit_expr(node.condition)} else "
+                f"{self.emit_expr(node.else_expr)})"
+            )
         if isinstance(node, ListLiteral):
             return "[" + ", ".join(self.emit_expr(e) for e in node.elements) + "]"
         if isinstance(node, Index):
-            return f"{self.emit_expr(node.base)}[{self.emit_expr(node.index)}]"
+            return f"{self.emit_expr(node.obj)}[{self.emit_expr(node.index)}]"
+        if isinstance(node, Slice):
+            parts = [node.start, node.stop, node.step]
+            return ":".join(self.emit_expr(p) if p is not None else "" for p in parts)
         if isinstance(node, Call):
             return f"{node.name}(" + ", ".join(self.emit_expr(a) for a in node.args) + ")"
@@ -3,7 +3,10 @@
 import re
 from collections import namedtuple
 
-Token = namedtuple("Token", ["type", "value", "line"])
+# column is 1-based; it defaults to None for hand-built tokens
+Token = namedtuple(
+    "Token", ["type", "value", "line", "column"], defaults=(None,)
+)
 
 # =========================================================
 # TOKEN SPECIFICATION
@@ -92,21 +95,42 @@ MASTER_RE = re.compile(
     "|".join(f"(?P<{name}>{pattern})" for name, pattern in TOKEN_SPEC)
 )
 
+# Same grammar over bytes, for lexing mmapped files without decoding
+# them up front
+MASTER_RE_BYTES = re.compile(MASTER_RE.pattern.encode("ascii"))
+
 # =========================================================
 # TOKENIZER
 # =========================================================
 
 def tokenize(code):
-    tokens = []
+    return list(iter_tokens(code))
+
+
+def iter_tokens(code):
+    """Lazily yield tokens from a str or a bytes-like buffer (e.g. mmap)."""
+    if isinstance(code, str):
+        matches = MASTER_RE.finditer(code)
+        decode = None
+    else:
+        matches = MASTER_RE_BYTES.finditer(code)
+        decode = bytes.decode
+
     line = 1
+    line_start = 0
 
-    for match in MASTER_RE.finditer(code):
+    for match in matches:
         kind = match.lastgroup
         value = match.group()
+        column = match.start() - line_start + 1
+
+        if decode is not None:
+            value = decode(value, "utf-8")
 
         if kind == "NEWLINE":
-            tokens.append(Token("NEWLINE", value, line))
+            yield Token("NEWLINE", value, line, column)
             line += 1
+            line_start = match.end()
 
         elif kind == "SKIP":
             continue
@@ -115,15 +139,13 @@ def tokenize(code):
             continue
 
         elif kind == "STRING":
-            tokens.append(Token("STRING", value[1:-1], line))
+            yield Token("STRING", value[1:-1], line, column)
 
         elif kind == "FLOAT":
-            tokens.append(Token("FLOAT", value, line))
+            yield Token("FLOAT", value, line, column)
 
         elif kind == "DOT":
-            tokens.append(Token("DOT", ".", line))
+            yield Token("DOT", ".", line, column)
 
         else:
-            tokens.append(Token(kind, value, line))
-
-    return tokens
+            yield Token(kind, value, line, column)
@@ -0,0 +1,218 @@
+# quirk/modules.py
+
+import functools
+import os
+import threading
+
+
+DEFAULT_MODULE_PATHS = [
+    ".",
+    "lang",
+]
+
+
+def module_paths():
+    """Search path for ``.sl`` modules, taken from ``QUIRK_PATH`` if set."""
+    env = os.environ.get("QUIRK_PATH")
+    if env:
+        return [p for p in env.split(os.pathsep) if p]
+    return list(DEFAULT_MODULE_PATHS)
+
+
+def find_module(name, paths=None):
+    for base in paths if paths is not None else module_paths():
+        path = os.path.join(base, f"{name}.sl")
+        if os.path.isfile(path):
+            return os.path.realpath(path)
+    return None
+
+
+def path_resolver(paths):
+    """Module resolver over ``paths`` made absolute now, so lookups no
+    longer depend on the process working directory."""
+    return functools.partial(
+        find_module, paths=[os.path.abspath(p) for p in paths]
+    )
+
+
+# =========================================================
+# MODULE REGISTRY
+# =========================================================
+
+class CircularImportError(Exception):
+    pass
+
+
+def stamp_of(path):
+    """(mtime_ns, size) of ``path``; None if it no longer exists."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class _PendingLoad:
+    """A module being executed by one thread; others wait on ``done``."""
+
+    def __init__(self, owner):
+        self.owner = owner
+        self.done = threading.Event()
+
+
+class ModuleRegistry:
+    """Process-wide cache of executed module namespaces.
+
+    Entries are keyed by resolved absolute path and revalidated against
+    the mtime and size of the file, and of every module it imported,
+    on every lookup. Modules execute outside the registry lock; only
+    threads importing the same module wait for each other.
+    """
+
+    def __init__(self):
+        self.entries = {}
+        # path -> {path: stamp} of the modules it loaded, transitively
+        self.dependencies = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.asts = {}
+        # path -> _PendingLoad, and thread id -> path it waits for
+        self._loading = {}
+        self._waiting = {}
+        self._lock = threading.RLock()
+
+    def load(self, path, execute):
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_size)
+        me = threading.get_ident()
+
+        while True:
+            with self._lock:
+                entry = self.entries.get(path)
+
+                if entry is not None:
+                    if entry[0] == stamp and self._deps_fresh(path):
+                        self.hits += 1
+                        return entry[1]
+                    self.invalidations += 1
+                    del self.entries[path]
+                    self.dependencies.pop(path, None)
+
+                pending = self._loading.get(path)
+                if pending is None:
+                    pending = self._loading[path] = _PendingLoad(me)
+                    self.misses += 1
+                    break
+
+                if self._waits_on(pending, me):
+                    raise CircularImportError(path)
+                self._waiting[me] = path
+
+            # Another thread is executing it; use its result, or try
+            # again if it failed
+            try:
+                pending.done.wait()
+            finally:
+                with self._lock:
+                    self._waiting.pop(me, None)
+
+        try:
+            namespace = execute(path)
+            with self._lock:
+                self.entries[path] = (stamp, namespace)
+                # The namespace now holds everything the AST was needed for
+                self.asts.pop(path, None)
+            return namespace
+        finally:
+            with self._lock:
+                del self._loading[path]
+            pending.done.set()
+
+    def _waits_on(self, pending, me):
+        """True if waiting for ``pending`` would wait for this thread:
+        an import cycle, within one thread or across several."""
+        seen = set()
+
+        while pending is not None:
+            owner = pending.owner
+            if owner == me:
+                return True
+            if owner in seen:
+                return False
+            seen.add(owner)
+
+            path = self._waiting.get(owner)
+            pending = self._loading.get(path) if path is not None else None
+
+        return False
+
+    def _deps_fresh(self, path):
+        return all(
+            stamp_of(dep) == stamp
+            for dep, stamp in self.dependencies.get(path, {}).items()
+        )
+
+    def record_dependencies(self, path, stamps):
+        """Note the modules executing ``path`` loaded, as {path: stamp}."""
+        with self._lock:
+            self.dependencies[path] = dict(stamps)
+
+    def stamps(self, path):
+        """{path: stamp} for ``path`` and every module it loaded."""
+        with self._lock:
+            entry = self.entries.get(path)
+            result = dict(self.dependencies.get(path, {}))
+
+        if entry is not None:
+            result[path] = entry[0]
+        return result
+
+    def fresh(self, path):
+        """True if ``path`` has been executed and not changed since."""
+        with self._lock:
+            entry = self.entries.get(path)
+
+        if entry is None:
+            return False
+
+        st = os.stat(path)
+        return entry[0] == (st.st_mtime_ns, st.st_size)
+
+    # -----------------------------------------------------
+    # Pre-parsed ASTs (see quirk/preload.py)
+    # -----------------------------------------------------
+
+    def store_ast(self, path, stamp, ast):
+        with self._lock:
+            self.asts[path] = (stamp, ast)
+
+    def get_ast(self, path):
+        with self._lock:
+            entry = self.asts.get(path)
+
+        if entry is None:
+            return None
+
+        st = os.stat(path)
+        if entry[0] != (st.st_mtime_ns, st.st_size):
+            return None
+        return entry[1]
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.dependencies.clear()
+            self.asts.clear()
+            self.hits = self.misses = self.invalidations = 0
+
+    def stats(self):
+        return {
+            "modules": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
+
+
+registry = ModuleRegistry()
@@ -7,12 +7,21 @@ from quirk.ast_nodes import *
 
 class QuirkSyntaxError(Exception):
     def __init__(self, message, token=None):
+        self.message = message
+        self.line = token.line if token else None
+        self.column = token.column if token else None
+
         if token:
             super().__init__(f"Syntax Error (line {token.line}): {message}")
         else:
             super().__init__(f"Syntax Error: {message}")
 
 
+def located(node, token):
+    node.column = token.column
+    return node
+
+
 # =========================================================
 # PARSER
 # =========================================================
@@ -60,15 +69,14 @@ class Parser:
     # -----------------------------------------------------
 
     def parse(self):
-        statements = []
+        return Program(list(self.statements()))
 
+    def statements(self):
         while self.current():
             self.skip_newlines()
             if not self.current():
                 break
-            statements.append(self.statement())
-
-        return Program(statements)
+            yield self.statement()
 
     # -----------------------------------------------------
     # Statements
@@ -105,11 +113,11 @@ class Parser:
 
         if tok.type == "BREAK":
             self.eat("BREAK")
-            return Break(tok.line)
+            return located(Break(tok.line), tok)
 
         if tok.type == "CONTINUE":
             self.eat("CONTINUE")
-            return Continue(tok.line)
+            return located(Continue(tok.line), tok)
 
         # Assignment or expression
         expr = self.expression()
@@ -122,7 +130,9 @@ class Parser:
             self.advance()
             value = self.expression()
 
-            if isinstance(expr, Variable):
+            if isinstance(expr, (Variable, Index)):
+                if isinstance(expr, Index) and isinstance(expr.index, Slice):
+                    raise QuirkSyntaxError("Cannot assign to a slice", tok)
                 if op == "EQUAL":
                     return Assign(expr, value, expr.line)
                 return CompoundAssign(expr, op, value, expr.line)
@@ -131,7 +141,7 @@ class Parser:
                 return Assign(TuplePattern(expr.elements, expr.line), value, expr.line)
 
             raise QuirkSyntaxError(
-                "Invalid assignment target (must be variable or tuple)",
+                "Invalid assignment target (must be variable, index or tuple)",
                 tok
             )
 
@@ -144,7 +154,7 @@ class Parser:
     def import_stmt(self):
         tok = self.eat("IMPORT")
         name = self.eat("IDENT")
-        return Import(name.value, tok.line)
+        return located(Import(name.value, tok.line), name)
 
     # -----------------------------------------------------
     # Print
@@ -263,7 +273,16 @@ class Parser:
     # -----------------------------------------------------
 
     def expression(self):
-        return self.or_expr()
+        node = self.or_expr()
+
+        # a if cond else b
+        if self.current() and self.current().type == "IF":
+            tok = self.eat("IF")
+            condition = self.or_expr()
+            self.eat("ELSE")
+            node = Conditional(condition, node, self.expression(), tok.line)
+
+        return node
 
     def or_expr(self):
         node = self.and_expr()
@@ -273,12 +292,18 @@ class Parser:
         return node
 
     def and_expr(self):
-        node = self.compare_expr()
+        node = self.not_expr()
         while self.current() and self.current().type == "AND":
             tok = self.eat("AND")
-            node = BinaryOp(node, "and", self.compare_expr(), tok.line)
+            node = BinaryOp(node, "and", self.not_expr(), tok.line)
         return node
 
+    def not_expr(self):
+        if self.current() and self.current().type == "NOT":
+            tok = self.eat("NOT")
+            return UnaryOp("not", self.not_expr(), tok.line)
+        return self.compare_expr()
+
     def compare_expr(self):
         node = self.additive_expr()
         while self.current() and self.current().type in ("EQEQ", "NEQ", "GT", "LT"):
@@ -294,12 +319,18 @@ class Parser:
         return node
 
     def term(self):
-        node = self.power()
+        node = self.unary()
         while self.current() and self.current().type in ("STAR", "MOD", "INTDIV"):
             tok = self.eat(self.current().type)
-            node = BinaryOp(node, tok.value, self.power(), tok.line)
+            node = BinaryOp(node, tok.value, self.unary(), tok.line)
         return node
 
+    def unary(self):
+        if self.current() and self.current().type == "MINUS":
+            tok = self.eat("MINUS")
+            return UnaryOp("-", self.unary(), tok.line)
+        return self.power()
+
     def power(self):
         node = self.primary()
         while self.current() and self.current().type == "POWER":
@@ -324,7 +355,7 @@ class Parser:
             return Number(float(self.eat("FLOAT").value), tok.line)
 
         if tok.type == "STRING":
-            return String(self.eat("STRING").value, tok.line)
+            return self.subscripts(String(self.eat("STRING").value, tok.line))
 
         if tok.type == "TRUE":
             self.eat("TRUE")
@@ -338,10 +369,10 @@ class Parser:
             return self.variable_or_call()
 
         if tok.type == "LPAREN":
-            return self.group_or_tuple()
+            return self.subscripts(self.group_or_tuple())
 
         if tok.type == "LBRACK":
-            return self.list_literal()
+            return self.subscripts(self.list_literal())
 
         if tok.type == "LBRACE":
             return self.map_or_set()
@@ -354,7 +385,7 @@ class Parser:
 
     def variable_or_call(self):
         tok = self.eat("IDENT")
-        node = Variable(tok.value, tok.line)
+        node = located(Variable(tok.value, tok.line), tok)
 
         while self.current():
             if self.current().type == "LPAREN":
@@ -373,11 +404,43 @@ class Parser:
                 attr = self.eat("IDENT")
                 node = Attribute(node, attr.value, attr.line)
 
+            elif self.current().type == "LBRACK":
+                node = self.index_or_slice(node)
+
             else:
                 break
 
         return node
 
+    def subscripts(self, node):
+        while self.current() and self.current().type == "LBRACK":
+            node = self.index_or_slice(node)
+        return node
+
+    def index_or_slice(self, obj):
+        start = self.eat("LBRACK")
+
+        first = None
+        if self.current() and self.current().type != "COLON":
+            first = self.expression()
+
+        if not self.current() or self.current().type != "COLON":
+            if first is None:
+                raise QuirkSyntaxError("Expected index expression", start)
+            self.eat("RBRACK")
+            return Index(obj, first, start.line)
+
+        parts = [first]
+        while self.current() and self.current().type == "COLON" and len(parts) < 3:
+            self.eat("COLON")
+            if self.current() and self.current().type not in ("COLON", "RBRACK"):
+                parts.append(self.expression())
+            else:
+                parts.append(None)
+
+        self.eat("RBRACK")
+        parts += [None] * (3 - len(parts))
+        return Index(obj, Slice(*parts, start.line), start.line)
 
 
     def group_or_tuple(self):
@@ -452,3 +515,23 @@ class Parser:
 
         self.eat("RBRACE")
         return SetLiteral(elements, start.line)
+
+
+# =========================================================
+# STREAMING PARSER
+# Pulls tokens from an iterator with one token of lookahead,
+# so top-level statements can be executed as they are parsed
+# =========================================================
+
+class StreamParser(Parser):
+    def __init__(self, tokens):
+        self.tokens = iter(tokens)
+        self.pos = 0
+        self._current = next(self.tokens, None)
+
+    def current(self):
+        return self._current
+
+    def advance(self):
+        self.pos += 1
+        self._current = next(self.tokens, None)
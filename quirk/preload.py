@@ -0,0 +1,168 @@
+# quirk/preload.py
+
+import gc
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from quirk.ast_interpreter import RuntimeError
+from quirk.ast_nodes import Import, walk
+from quirk.lexer import tokenize
+from quirk.modules import find_module, registry
+from quirk.parser import Parser, QuirkSyntaxError
+
+
+# Below this much source per wave, parsing inline beats starting
+# a process pool
+MIN_PARALLEL_BYTES = 64 * 1024
+
+
+# =========================================================
+# IMPORT PRE-PASS
+# Walks a program's imports transitively before it runs,
+# parsing each wave of newly discovered modules in parallel.
+# The parsed ASTs are handed to the module registry, so
+# execution only has to run them.
+# =========================================================
+
+def imports_of(ast):
+    """(name, line) of every import in ``ast``, first occurrence only."""
+    seen = {}
+    for node in walk(ast):
+        if isinstance(node, Import) and node.module_name not in seen:
+            seen[node.module_name] = node.line
+    return list(seen.items())
+
+
+def parse_module(path):
+    """Read and parse one module; runs in the pool workers.
+
+    Syntax errors are not raised here: the module is left unparsed
+    so the import reports them exactly as it would without the
+    pre-pass.
+    """
+    st = os.stat(path)
+    stamp = (st.st_mtime_ns, st.st_size)
+
+    with open(path, "r") as f:
+        code = f.read()
+
+    try:
+        ast = Parser(tokenize(code)).parse()
+    except QuirkSyntaxError:
+        ast = None
+
+    return path, stamp, ast
+
+
+def _resolve(imports, resolver):
+    resolved = []
+    for name, line in imports:
+        path = resolver(name)
+        if path is not None:
+            resolved.append((name, line, path))
+    return resolved
+
+
+def _parse_wave(paths, pool, jobs):
+    jobs = jobs or os.cpu_count() or 1
+    size = sum(os.path.getsize(p) for p in paths)
+
+    if pool[0] is None and (
+        jobs == 1 or len(paths) < 2 or size < MIN_PARALLEL_BYTES
+    ):
+        return [parse_module(p) for p in paths]
+
+    if pool[0] is None:
+        pool[0] = ProcessPoolExecutor(max_workers=jobs)
+    return list(pool[0].map(parse_module, paths))
+
+
+def build_graph(program, jobs=None, resolver=find_module,
+                registry=registry):
+    """Map each module path reachable from ``program`` to the
+    ``(name, line, path)`` imports it makes; None is the program."""
+    graph = {None: _resolve(imports_of(program), resolver)}
+    frontier = []
+    pool = [None]
+
+    def discover(deps):
+        for _, _, path in deps:
+            if path in graph or path in frontier:
+                continue
+            if registry.fresh(path):
+                # Already executed: its dependencies are loaded too
+                graph[path] = []
+                continue
+            frontier.append(path)
+
+    discover(graph[None])
+
+    # The ASTs are acyclic but numerous: collecting while they pile
+    # up rescans all of them on every full pass
+    enabled = gc.isenabled()
+    gc.disable()
+
+    try:
+        while frontier:
+            wave, frontier = frontier, []
+            for path, stamp, ast in _parse_wave(wave, pool, jobs):
+                if ast is None:
+                    graph[path] = []
+                    continue
+                registry.store_ast(path, stamp, ast)
+                graph[path] = _resolve(imports_of(ast), resolver)
+                discover(graph[path])
+    finally:
+        if pool[0] is not None:
+            pool[0].shutdown()
+        if enabled:
+            gc.enable()
+
+    return graph
+
+
+def find_cycle(graph):
+    """First import cycle reachable from the program, as the line of
+    the program import that leads into it plus the module names along
+    the cycle; None if the graph is acyclic."""
+    done = set()
+
+    for _, line, root in graph[None]:
+        if root in done:
+            continue
+
+        stack = [(root, iter(graph.get(root, ())))]
+        names = [os.path.splitext(os.path.basename(root))[0]]
+        active = {root: 0}
+
+        while stack:
+            path, deps = stack[-1]
+            for name, _, dep in deps:
+                if dep in active:
+                    return line, names[active[dep]:] + [name]
+                if dep not in done:
+                    active[dep] = len(stack)
+                    stack.append((dep, iter(graph.get(dep, ()))))
+                    names.append(name)
+                    break
+            else:
+                stack.pop()
+                names.pop()
+                del active[path]
+                done.add(path)
+
+    return None
+
+
+def preload_imports(program, jobs=None, resolver=find_module,
+                    registry=registry):
+    graph = build_graph(
+        program, jobs=jobs, resolver=resolver, registry=registry
+    )
+
+    cycle = find_cycle(graph)
+    if cycle is not None:
+        line, names = cycle
+        raise RuntimeError(f"Circular import: {' -> '.join(names)}", line)
+
+    return graph
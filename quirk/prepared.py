@@ -0,0 +1,110 @@
+# quirk/prepared.py
+
+import io
+
+from quirk.ast_interpreter import BUILTINS, Interpreter
+from quirk.ast_nodes import FunctionDef
+from quirk.lexer import tokenize
+from quirk.modules import module_paths, path_resolver
+from quirk.parser import Parser
+from quirk.preload import imports_of
+from quirk.runner import outcome
+from quirk.values import LazyModule, isolate
+
+
+# =========================================================
+# PREPARED PROGRAMS
+# Lex, parse and resolve imports once; run many times, each
+# run in a fresh global frame. Everything held here pickles,
+# so a prepared program can be shipped to worker processes.
+# =========================================================
+
+class PreparedResolver:
+    """Resolver with the program's own imports looked up in advance."""
+
+    def __init__(self, resolved, fallback):
+        self.resolved = resolved
+        self.fallback = fallback
+
+    def __call__(self, name):
+        if name in self.resolved:
+            return self.resolved[name]
+        return self.fallback(name)
+
+
+class PreparedProgram:
+    def __init__(self, program, resolver, eager_imports=False,
+                 adaptive=False):
+        self.program = program
+        self.resolver = resolver
+        self.eager_imports = eager_imports
+        self.adaptive = adaptive
+
+    def run(self, inputs=None, max_steps=None, max_memory=None, stdout=None):
+        """Run with ``inputs`` bound as globals.
+
+        Returns a dict like ``runner.run_source``'s, plus ``globals``:
+        the names the program left bound, excluding builtins, modules
+        and function definitions. Inputs are copied in and globals
+        copied out, so neither side sees the other's later changes.
+        """
+        out = stdout if stdout is not None else io.StringIO()
+
+        interpreter = Interpreter(
+            eager_imports=self.eager_imports,
+            adaptive=self.adaptive,
+            max_steps=max_steps,
+            max_memory=max_memory,
+            stdout=out,
+            resolver=self.resolver,
+        )
+
+        frame = interpreter.scopes.scopes[0]
+        frame.update(isolate(dict(inputs or {})))
+
+        result = {"status": "ok", "output": "", "error": None, "line": None}
+
+        with outcome(result):
+            interpreter.run(self.program)
+
+        result["cacheable"] = interpreter.cacheable and result["status"] not in (
+            "internal_error", "memory_error"
+        )
+        result["globals"] = isolate(_user_globals(interpreter, frame))
+        if stdout is None:
+            result["output"] = out.getvalue()
+        return result
+
+
+def _user_globals(interpreter, frame):
+    modules = {id(m) for m in interpreter.modules.values()}
+
+    return {
+        name: value
+        for name, value in frame.items()
+        if BUILTINS.get(name) is not value
+        and not isinstance(value, (FunctionDef, LazyModule))
+        and id(value) not in modules
+    }
+
+
+def prepare(source, paths=None, eager_imports=False, adaptive=False):
+    """Lex and parse ``source`` and resolve its imports, once.
+
+    Module paths are fixed now, against ``paths`` (default: the
+    current search path), so later runs do not depend on the working
+    directory. Syntax errors raise QuirkSyntaxError here. With
+    ``adaptive``, runs quicken the shared AST, so later runs start
+    from the specializations earlier ones made.
+    """
+    program = Parser(tokenize(source)).parse()
+
+    fallback = path_resolver(paths if paths is not None else module_paths())
+    resolved = {name: fallback(name) for name, _ in imports_of(program)}
+
+    return PreparedProgram(
+        program,
+        PreparedResolver(resolved, fallback),
+        eager_imports=eager_imports,
+        adaptive=adaptive,
+    )
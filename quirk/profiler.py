@@ -0,0 +1,243 @@
+# quirk/profiler.py
+
+import os
+import sys
+import time
+
+from quirk.ast_interpreter import Interpreter
+from quirk.runner import run_source
+
+
+# =========================================================
+# PROFILER
+# Runs on an Interpreter instance's hooks, so unprofiled
+# interpreters are unaffected. Lines are keyed by (file,
+# line): functions imported from modules report lines of
+# their own file.
+# =========================================================
+
+class LineStats:
+    __slots__ = ("hits", "inclusive", "exclusive", "active")
+
+    def __init__(self):
+        self.hits = 0
+        self.inclusive = 0.0
+        self.exclusive = 0.0
+        self.active = 0
+
+
+class FunctionStats:
+    __slots__ = (
+        "name", "file", "line", "calls", "cumulative", "own", "active",
+    )
+
+    def __init__(self, name, line, file=None):
+        self.name = name
+        self.file = file
+        self.line = line
+        self.calls = 0
+        self.cumulative = 0.0
+        self.own = 0.0
+        self.active = 0
+
+
+class Profiler:
+    def __init__(self, interpreter, main_file="<main>",
+                 clock=time.perf_counter):
+        self.interpreter = interpreter
+        self.main_file = main_file
+        self.clock = clock
+
+        # (file, line) -> LineStats; (file, name, line) -> FunctionStats
+        self.lines = {}
+        self.functions = {}
+        self.stacks = {}
+
+        # [stats, start, child_time] for each statement executing
+        self._frames = []
+        # function names for the collapsed-stack output
+        self._calls = ["<module>"]
+        # [stats, start] for each call in progress
+        self._function_frames = []
+        # file whose lines are executing
+        self._files = [main_file]
+
+        self._hooks = {
+            "statement": self._on_statement,
+            "statement_end": self._on_statement_end,
+            "call": self._on_call,
+            "return": self._on_return,
+        }
+        for event, fn in self._hooks.items():
+            interpreter.add_hook(event, fn)
+
+    # -----------------------------------------------------
+    # Instrumentation
+    # -----------------------------------------------------
+
+    def _on_statement(self, node, line, depth):
+        key = (self._files[-1], line)
+        stats = self.lines.get(key)
+        if stats is None:
+            stats = self.lines[key] = LineStats()
+
+        stats.hits += 1
+        stats.active += 1
+        self._frames.append([stats, self.clock(), 0.0])
+
+    def _on_statement_end(self, node, line, depth):
+        stats, start, children = self._frames.pop()
+        elapsed = self.clock() - start
+        stats.active -= 1
+
+        if not stats.active:
+            stats.inclusive += elapsed
+
+        own = elapsed - children
+        stats.exclusive += own
+
+        if self._function_frames:
+            self._function_frames[-1][0].own += own
+
+        key = ";".join(self._calls)
+        self.stacks[key] = self.stacks.get(key, 0.0) + own
+
+        if self._frames:
+            self._frames[-1][2] += elapsed
+
+    def _on_call(self, fn, line, depth):
+        file = fn.file or self.main_file
+        key = (file, fn.name, fn.line)
+        stats = self.functions.get(key)
+        if stats is None:
+            stats = self.functions[key] = FunctionStats(fn.name, fn.line, file)
+
+        stats.calls += 1
+        stats.active += 1
+        self._calls.append(fn.name)
+        self._files.append(file)
+        self._function_frames.append([stats, self.clock()])
+
+    def _on_return(self, fn, line, depth):
+        stats, start = self._function_frames.pop()
+        elapsed = self.clock() - start
+        self._calls.pop()
+        self._files.pop()
+        stats.active -= 1
+
+        if not stats.active:
+            stats.cumulative += elapsed
+
+    def detach(self):
+        for event, fn in self._hooks.items():
+            self.interpreter.remove_hook(event, fn)
+
+    # -----------------------------------------------------
+    # Reports
+    # -----------------------------------------------------
+
+    def _location(self, file, line):
+        if file == self.main_file:
+            return str(line)
+        return f"{os.path.basename(file)}:{line}"
+
+    def _source(self, file, line, source_lines, cache):
+        if file == self.main_file:
+            lines = source_lines
+        else:
+            lines = cache.get(file)
+            if lines is None:
+                try:
+                    with open(file, "r") as f:
+                        lines = cache[file] = f.read().splitlines()
+                except OSError:
+                    lines = cache[file] = []
+
+        if lines and 0 < line <= len(lines):
+            return lines[line - 1].strip()
+        return ""
+
+    def line_table(self, source_lines=None, sort="exclusive", limit=None):
+        """Per-line stats; ``source_lines`` are the main file's, other
+        files' lines are read from disk."""
+        rows = sorted(
+            self.lines.items(),
+            key=lambda item: getattr(item[1], sort),
+            reverse=True
+        )[:limit]
+
+        labels = [self._location(file, line) for (file, line), _ in rows]
+        width = max([6] + [len(label) for label in labels])
+        sources = {}
+
+        out = [
+            f"{'line':>{width}} {'hits':>10} {'incl ms':>10} {'excl ms':>10}"
+            "  source"
+        ]
+        for label, ((file, line), stats) in zip(labels, rows):
+            text = self._source(file, line, source_lines, sources)
+            out.append(
+                f"{label:>{width}} {stats.hits:>10} "
+                f"{stats.inclusive * 1000:>10.3f} "
+                f"{stats.exclusive * 1000:>10.3f}  {text}"
+            )
+        return "\n".join(out)
+
+    def function_table(self, limit=None):
+        rows = sorted(
+            self.functions.values(),
+            key=lambda stats: stats.cumulative,
+            reverse=True
+        )[:limit]
+
+        labels = [self._location(stats.file, stats.line) for stats in rows]
+        width = max([6] + [len(label) for label in labels])
+
+        out = [
+            f"{'function':<24} {'line':>{width}} {'calls':>10} "
+            f"{'cum ms':>10} {'own ms':>10}"
+        ]
+        for label, stats in zip(labels, rows):
+            out.append(
+                f"{stats.name:<24} {label:>{width}} {stats.calls:>10} "
+                f"{stats.cumulative * 1000:>10.3f} {stats.own * 1000:>10.3f}"
+            )
+        return "\n".join(out)
+
+    def collapsed(self):
+        """Collapsed stacks weighted in microseconds, for flamegraph tools."""
+        return "\n".join(
+            f"{stack} {max(1, round(seconds * 1e6))}"
+            for stack, seconds in sorted(self.stacks.items())
+        ) + "\n"
+
+
+def profile_file(path, collapsed=None, sort="exclusive", limit=None,
+                 max_steps=None, out=sys.stderr):
+    with open(path, "r") as f:
+        code = f.read()
+
+    interpreter = Interpreter(max_steps=max_steps)
+    profiler = Profiler(interpreter, main_file=os.path.realpath(path))
+
+    start = time.perf_counter()
+    result = run_source(code, interpreter, stdout=sys.stdout)
+    total = time.perf_counter() - start
+
+    profiler.detach()
+
+    if result["status"] != "ok":
+        print(result["error"])
+
+    print(f"\nTotal: {total * 1000:.3f} ms\n", file=out)
+    table = profiler.line_table(code.splitlines(), sort=sort, limit=limit)
+    print(table, file=out)
+
+    if profiler.functions:
+        print("", file=out)
+        print(profiler.function_table(limit=limit), file=out)
+
+    if collapsed:
+        with open(collapsed, "w") as f:
+            f.write(profiler.collapsed())
+        print(f"\nCollapsed stacks written to {collapsed}", file=out)
@@ -0,0 +1,402 @@
+# quirk/quicken.py
+
+import operator
+
+from quirk.ast_nodes import (
+    BinaryOp, Boolean, Call, CompoundAssign, FunctionDef, Number, String,
+    Variable,
+)
+
+
+# Executions a node is profiled for before it is specialized
+WARMUP = 8
+# Guard misses a specialized node takes before it is deoptimized
+MAX_MISSES = 8
+# Deoptimizations before a node is left generic for good; each
+# one doubles the warmup, so polymorphic nodes settle quickly
+MAX_DEOPTS = 4
+
+
+# =========================================================
+# QUICKENING
+# Adaptive interpreters give every node they reach a handler
+# in ``node.quick``. Binary operators, ``x += ...`` and calls
+# start on a profiling handler that records what they see;
+# once that is stable for WARMUP executions it is replaced
+# by a handler specialized for it (int + int, str + str, a
+# call to one known function). Specialized handlers check
+# their guard on every execution and on a miss compute the
+# generic result, so any handler is correct for any operands.
+#
+# ASTs are shared between runs and threads. Handlers and
+# profiles on a node are only ever replaced whole, never
+# edited into an invalid state, so a racing update at worst
+# costs a re-specialization. Profile counts on nodes are
+# approximate for the same reason; the hit counters kept on
+# each interpreter are exact.
+# =========================================================
+
+OPERATORS = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "//": operator.floordiv,
+    "%": operator.mod,
+    "**": operator.pow,
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">": operator.gt,
+    "<": operator.lt,
+}
+
+ASSIGN_OPERATORS = {
+    "PLUSEQUAL": operator.add,
+    "MINUSEQUAL": operator.sub,
+}
+
+
+class Profile:
+    """What one node has seen since it was last (de)specialized."""
+
+    def __init__(self, deopts=0):
+        self.deopts = deopts
+        self.threshold = WARMUP << deopts
+        # Operand types, or the FunctionDef called
+        self.seen = None
+        self.count = 0
+        self.misses = 0
+
+
+def install(node, generic):
+    """Pick and set the first handler for ``node``; ``generic`` runs
+    nodes that are never specialized."""
+    kind = type(node)
+
+    if kind is BinaryOp and node.op in OPERATORS:
+        quick = _start(node, _profile_binary)
+    elif (kind is CompoundAssign and type(node.target) is Variable
+            and node.op in ASSIGN_OPERATORS):
+        quick = _start(node, _profile_assign)
+    elif kind is Call:
+        quick = _start(node, _profile_call)
+    elif kind in (Number, String, Boolean):
+        quick = _constant
+    elif kind is Variable:
+        quick = _variable
+    else:
+        quick = generic
+
+    node.quick = quick
+    return quick
+
+
+def _start(node, handler):
+    node.quick_profile = Profile()
+    return handler
+
+
+def _observe(node, seen):
+    """Record one execution; True once ``seen`` has been stable long
+    enough to specialize on."""
+    profile = node.quick_profile
+
+    if profile.seen != seen:
+        profile.seen = seen
+        profile.count = 0
+
+    profile.count += 1
+    return profile.count >= profile.threshold
+
+
+def _miss(interp, node, profiler, generic):
+    """Count a guard miss; after MAX_MISSES send the node back to
+    ``profiler``, or to ``generic`` once it has been there too often."""
+    interp.quick_misses += 1
+    profile = node.quick_profile
+    profile.misses += 1
+
+    if profile.misses < MAX_MISSES:
+        return
+
+    interp.quick_deopts += 1
+    deopts = profile.deopts + 1
+    node.quick_profile = Profile(deopts)
+    node.quick = generic if deopts > MAX_DEOPTS else profiler
+
+
+# =========================================================
+# UNSPECIALIZED NODES
+# =========================================================
+
+def _constant(interp, node):
+    return node.value
+
+
+def _variable(interp, node):
+    try:
+        return interp.scopes.get(node.name)
+    except KeyError:
+        # Let the generic path raise its usual error
+        return type(interp).evaluate(interp, node)
+
+
+# =========================================================
+# BINARY OPERATORS
+# =========================================================
+
+def _profile_binary(interp, node):
+    left = interp.evaluate(node.left)
+    right = interp.evaluate(node.right)
+    interp.quick_generic += 1
+
+    seen = (type(left), type(right))
+    if _observe(node, seen):
+        node.quick = _BINARY.get((node.op, seen), _typed_binary)
+        interp.quick_specialized += 1
+
+    return OPERATORS[node.op](left, right)
+
+
+def _generic_binary(interp, node):
+    left = interp.evaluate(node.left)
+    right = interp.evaluate(node.right)
+    interp.quick_generic += 1
+    return OPERATORS[node.op](left, right)
+
+
+def _binary_miss(interp, node, left, right):
+    _miss(interp, node, _profile_binary, _generic_binary)
+    return OPERATORS[node.op](left, right)
+
+
+def _typed_binary(interp, node):
+    left = interp.evaluate(node.left)
+    right = interp.evaluate(node.right)
+
+    if (type(left), type(right)) == node.quick_profile.seen:
+        interp.quick_hits += 1
+        return OPERATORS[node.op](left, right)
+    return _binary_miss(interp, node, left, right)
+
+
+def _int_add(interp, node):
+    left = interp.evaluate(node.left)
+    right = interp.evaluate(node.right)
+
+    if type(left) is int and type(right) is int:
+        interp.quick_hits += 1
+        return left + right
+    return _binary_miss(interp, node, left, right)
+
+
+def _int_sub(interp, node):
+    left = interp.evaluate(node.left)
+    right = interp.evaluate(node.right)
+
+    if type(left) is int and type(right) is int:
+        interp.quick_hits += 1
+        return left - right
+    return _binary_miss(interp, node, left, right)
+
+
+def _int_mul(interp, node):
+    left = interp.evaluate(node.left)
+    right = interp.evaluate(node.right)
+
+    if type(left) is int and type(right) is int:
+        interp.quick_hits += 1
+        return left * right
+    return _binary_miss(interp, node, left, right)
+
+
+def _int_lt(interp, node):
+    left = interp.evaluate(node.left)
+    right = interp.evaluate(node.right)
+
+    if type(left) is int and type(right) is int:
+        interp.quick_hits += 1
+        return left < right
+    return _binary_miss(interp, node, left, right)
+
+
+def _int_gt(interp, node):
+    left = interp.evaluate(node.left)
+    right = interp.evaluate(node.right)
+
+    if type(left) is int and type(right) is int:
+        interp.quick_hits += 1
+        return left > right
+    return _binary_miss(interp, node, left, right)
+
+
+def _int_eq(interp, node):
+    left = interp.evaluate(node.left)
+    right = interp.evaluate(node.right)
+
+    if type(left) is int and type(right) is int:
+        interp.quick_hits += 1
+        return left == right
+    return _binary_miss(interp, node, left, right)
+
+
+def _int_ne(interp, node):
+    left = interp.evaluate(node.left)
+    right = interp.evaluate(node.right)
+
+    if type(left) is int and type(right) is int:
+        interp.quick_hits += 1
+        return left != right
+    return _binary_miss(interp, node, left, right)
+
+
+def _str_add(interp, node):
+    left = interp.evaluate(node.left)
+    right = interp.evaluate(node.right)
+
+    if type(left) is str and type(right) is str:
+        interp.quick_hits += 1
+        return left + right
+    return _binary_miss(interp, node, left, right)
+
+
+_BINARY = {
+    ("+", (int, int)): _int_add,
+    ("-", (int, int)): _int_sub,
+    ("*", (int, int)): _int_mul,
+    ("<", (int, int)): _int_lt,
+    (">", (int, int)): _int_gt,
+    ("==", (int, int)): _int_eq,
+    ("!=", (int, int)): _int_ne,
+    ("+", (str, str)): _str_add,
+}
+
+
+# =========================================================
+# COMPOUND ASSIGNMENT
+# x += value and x -= value on a plain name
+# =========================================================
+
+def _profile_assign(interp, node):
+    name = node.target.name
+    current = interp.scopes.get(name)
+    value = interp.evaluate(node.value)
+    interp.quick_generic += 1
+
+    seen = (type(current), type(value))
+    if _observe(node, seen):
+        node.quick = _ASSIGN.get((node.op, seen), _typed_assign)
+        interp.quick_specialized += 1
+
+    interp.scopes.set(name, ASSIGN_OPERATORS[node.op](current, value))
+
+
+def _generic_assign(interp, node):
+    name = node.target.name
+    current = interp.scopes.get(name)
+    value = interp.evaluate(node.value)
+    interp.quick_generic += 1
+    interp.scopes.set(name, ASSIGN_OPERATORS[node.op](current, value))
+
+
+def _assign_miss(interp, node, name, current, value):
+    _miss(interp, node, _profile_assign, _generic_assign)
+    interp.scopes.set(name, ASSIGN_OPERATORS[node.op](current, value))
+
+
+def _typed_assign(interp, node):
+    name = node.target.name
+    current = interp.scopes.get(name)
+    value = interp.evaluate(node.value)
+
+    if (type(current), type(value)) == node.quick_profile.seen:
+        interp.quick_hits += 1
+        interp.scopes.set(name, ASSIGN_OPERATORS[node.op](current, value))
+        return
+    _assign_miss(interp, node, name, current, value)
+
+
+def _int_add_assign(interp, node):
+    name = node.target.name
+    scopes = interp.scopes
+    current = scopes.get(name)
+    value = interp.evaluate(node.value)
+
+    if type(current) is int and type(value) is int:
+        interp.quick_hits += 1
+        scopes.set(name, current + value)
+        return
+    _assign_miss(interp, node, name, current, value)
+
+
+def _int_sub_assign(interp, node):
+    name = node.target.name
+    scopes = interp.scopes
+    current = scopes.get(name)
+    value = interp.evaluate(node.value)
+
+    if type(current) is int and type(value) is int:
+        interp.quick_hits += 1
+        scopes.set(name, current - value)
+        return
+    _assign_miss(interp, node, name, current, value)
+
+
+def _str_add_assign(interp, node):
+    name = node.target.name
+    scopes = interp.scopes
+    current = scopes.get(name)
+    value = interp.evaluate(node.value)
+
+    if type(current) is str and type(value) is str:
+        interp.quick_hits += 1
+        scopes.set(name, current + value)
+        return
+    _assign_miss(interp, node, name, current, value)
+
+
+_ASSIGN = {
+    ("PLUSEQUAL", (int, int)): _int_add_assign,
+    ("MINUSEQUAL", (int, int)): _int_sub_assign,
+    ("PLUSEQUAL", (str, str)): _str_add_assign,
+}
+
+
+# =========================================================
+# CALLS
+# =========================================================
+
+def _profile_call(interp, node):
+    func = interp.evaluate(node.name)
+    args = [interp.evaluate(a) for a in node.args]
+    interp.quick_generic += 1
+
+    # Only calls that always reach the same function, with the right
+    # number of arguments, are worth a direct path
+    if type(func) is FunctionDef and len(args) == len(func.params):
+        if _observe(node, func):
+            node.quick = _direct_call
+            interp.quick_specialized += 1
+    elif _observe(node, None):
+        # Natives are already called directly; stop profiling
+        node.quick = _generic_call
+
+    return interp.call_value(func, args, node.line)
+
+
+def _generic_call(interp, node):
+    func = interp.evaluate(node.name)
+    args = [interp.evaluate(a) for a in node.args]
+    interp.quick_generic += 1
+    return interp.call_value(func, args, node.line)
+
+
+def _direct_call(interp, node):
+    func = interp.evaluate(node.name)
+    args = [interp.evaluate(a) for a in node.args]
+
+    if func is node.quick_profile.seen:
+        interp.quick_hits += 1
+        return interp.call_function(func, args)
+
+    _miss(interp, node, _profile_call, _generic_call)
+    return interp.call_value(func, args, node.line)
@@ -0,0 +1,220 @@
+# quirk/runner.py
+
+import io
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from quirk.ast_nodes import walk
+from quirk.lexer import tokenize
+from quirk.parser import Parser, QuirkSyntaxError
+from quirk.ast_interpreter import Interpreter, RuntimeError
+
+
+# =========================================================
+# PHASE STATS
+# =========================================================
+
+@contextmanager
+def phase(timings, name):
+    wall = time.perf_counter()
+    cpu = time.process_time()
+
+    try:
+        yield
+    finally:
+        timings[name] = {
+            "wall": time.perf_counter() - wall,
+            "cpu": time.process_time() - cpu,
+        }
+
+
+class MemoryStats:
+    """Peak traced memory, AST/token counts and max Quirk call depth."""
+
+    def __init__(self, interpreter):
+        self.interpreter = interpreter
+        self.max_depth = 0
+        self.tokens = 0
+        self.ast_nodes = 0
+        self.peak_bytes = 0
+        self._tracing = tracemalloc.is_tracing()
+
+    def _on_call(self, node, line, depth):
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+    def start(self):
+        self.interpreter.add_hook("call", self._on_call)
+        if not self._tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+
+    def stop(self):
+        self.peak_bytes = tracemalloc.get_traced_memory()[1]
+        if not self._tracing:
+            tracemalloc.stop()
+        self.interpreter.remove_hook("call", self._on_call)
+
+    def as_dict(self):
+        return {
+            "peak_bytes": self.peak_bytes,
+            "ast_nodes": self.ast_nodes,
+            "tokens": self.tokens,
+            "max_depth": self.max_depth,
+        }
+
+
+# =========================================================
+# STRUCTURED EXECUTION
+# =========================================================
+
+@contextmanager
+def outcome(result):
+    """Record a Quirk error raised in the block as the result's status."""
+    try:
+        yield
+
+    except QuirkSyntaxError as e:
+        result.update(status="syntax_error", error=str(e), line=e.line)
+
+    except RuntimeError as e:
+        result.update(status="runtime_error", error=str(e), line=e.line)
+
+    except MemoryError:
+        # A hard address-space limit was hit before the interpreter's
+        # own accounting noticed
+        result.update(
+            status="memory_error",
+            error="Runtime Error: Out of memory."
+        )
+
+    except Exception:
+        result.update(
+            status="internal_error",
+            error="Internal Error: Unexpected failure."
+        )
+
+
+def run_source(code, interpreter=None, max_steps=None, stdout=None,
+               stats=False, memstats=False, max_memory=None):
+    """Run ``code`` and return its captured output and outcome as a dict.
+
+    When ``stdout`` is given, program output is written there as it is
+    produced and the result's ``output`` is left empty. ``stats`` adds
+    per-phase wall/CPU timings and ``memstats`` adds memory figures
+    under ``result["stats"]``.
+    """
+    result = {"status": "ok", "output": "", "error": None, "line": None}
+    out = stdout if stdout is not None else io.StringIO()
+
+    # Output goes to the interpreter's own sink rather than a redirected
+    # sys.stdout, so concurrent runs on other threads stay separate
+    if interpreter is None:
+        interpreter = Interpreter(max_steps=max_steps, max_memory=max_memory)
+
+    previous_stdout = interpreter.stdout
+    interpreter.stdout = out
+
+    timings = {}
+    memory = MemoryStats(interpreter) if memstats else None
+    if memory:
+        memory.start()
+
+    try:
+        with outcome(result):
+            with phase(timings, "lex"):
+                tokens = tokenize(code)
+            with phase(timings, "parse"):
+                ast = Parser(tokens).parse()
+
+            if memory:
+                memory.tokens = len(tokens)
+                memory.ast_nodes = sum(1 for _ in walk(ast))
+
+            with phase(timings, "execute"):
+                interpreter.run(ast)
+
+    finally:
+        interpreter.stdout = previous_stdout
+
+    if memory:
+        memory.stop()
+
+    result["cacheable"] = interpreter.cacheable and result["status"] not in (
+        "internal_error", "memory_error"
+    )
+    if result["cacheable"] and interpreter.module_stamps:
+        # For revalidating a cached result; the mtime is a string as
+        # it overflows a JavaScript number
+        result["modules"] = [
+            [path, str(mtime_ns), size]
+            for path, (mtime_ns, size) in interpreter.module_stamps.items()
+        ]
+
+    if stats or memory:
+        result["stats"] = {}
+
+    if stats:
+        # Lazy imports load during execution; report them separately
+        timings["import"] = {
+            "wall": interpreter.import_wall,
+            "cpu": interpreter.import_cpu,
+        }
+        if "execute" in timings:
+            timings["execute"]["wall"] -= interpreter.import_wall
+            timings["execute"]["cpu"] -= interpreter.import_cpu
+        result["stats"]["timings"] = timings
+
+        if interpreter.adaptive:
+            result["stats"]["quickening"] = interpreter.quickening_stats()
+
+        # Totals for the interpreter's registry, usually process-wide
+        result["stats"]["modules"] = interpreter.registry.stats()
+
+    if memory:
+        result["stats"]["memory"] = memory.as_dict()
+
+    if stdout is None:
+        result["output"] = out.getvalue()
+    else:
+        out.flush()
+    return result
+
+
+def format_stats(stats):
+    lines = []
+
+    for name in ("lex", "parse", "import", "execute"):
+        t = stats.get("timings", {}).get(name)
+        if t is not None:
+            lines.append(
+                f"{name:<8} wall {t['wall'] * 1000:9.3f} ms"
+                f"   cpu {t['cpu'] * 1000:9.3f} ms"
+            )
+
+    quick = stats.get("quickening")
+    if quick:
+        lines.append(
+            f"quickened hit rate {quick['hit_rate'] * 100:.1f}%"
+            f"   ({quick['hits']} hits, {quick['misses']} misses,"
+            f" {quick['generic']} generic, {quick['specialized']}"
+            f" specialized, {quick['deopts']} deopts)"
+        )
+
+    modules = stats.get("modules")
+    if modules:
+        lines.append(
+            f"module cache {modules['modules']} cached"
+            f"   ({modules['hits']} hits, {modules['misses']} misses,"
+            f" {modules['invalidations']} invalidations)"
+        )
+
+    memory = stats.get("memory")
+    if memory:
+        lines.append(f"peak memory  {memory['peak_bytes'] / 1024:.1f} KiB")
+        lines.append(f"tokens       {memory['tokens']}")
+        lines.append(f"ast nodes    {memory['ast_nodes']}")
+        lines.append(f"max depth    {memory['max_depth']}")
+
+    return "\n".join(lines)
@@ -0,0 +1,273 @@
+# quirk/serve.py
+
+import json
+import os
+import socket
+import struct
+import sys
+import threading
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from quirk.runner import run_source
+
+
+HEADER = struct.Struct(">I")
+
+
+# =========================================================
+# FRAMING
+# Each message is a 4-byte big-endian length followed by
+# that many bytes of UTF-8 JSON.
+# =========================================================
+
+def read_exact(stream, size):
+    data = b""
+    while len(data) < size:
+        chunk = stream.read(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+
+def read_frame(stream):
+    header = read_exact(stream, HEADER.size)
+    if header is None:
+        return None
+
+    (length,) = HEADER.unpack(header)
+    body = read_exact(stream, length)
+    if body is None:
+        return None
+
+    return json.loads(body.decode("utf-8"))
+
+
+def write_frame(stream, message):
+    body = json.dumps(message).encode("utf-8")
+    stream.write(HEADER.pack(len(body)) + body)
+    stream.flush()
+
+
+# =========================================================
+# STREAMED OUTPUT
+# =========================================================
+
+class OutputFrames:
+    """File-like sink that forwards program output as ``output`` frames.
+
+    Writes are coalesced and sent once enough text has accumulated or,
+    from a timer thread, ``interval`` seconds after the first unsent
+    write, so output is not held back while the program computes.
+    """
+
+    def __init__(self, writer, job_id, chunk_size=4096, interval=0.05):
+        self.writer = writer
+        self.job_id = job_id
+        self.chunk_size = chunk_size
+        self.interval = interval
+        self.parts = []
+        self.size = 0
+        self.timer = None
+        # The timer thread and the run thread both send frames
+        self.lock = threading.Lock()
+
+    def write(self, text):
+        with self.lock:
+            self.parts.append(text)
+            self.size += len(text)
+
+            if self.size >= self.chunk_size:
+                self._send()
+            elif self.timer is None:
+                self.timer = threading.Timer(self.interval, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+
+        return len(text)
+
+    def flush(self):
+        with self.lock:
+            self._send()
+
+    def _send(self):
+        if self.timer is not None:
+            # Harmless if this is the timer itself
+            self.timer.cancel()
+            self.timer = None
+
+        if not self.parts:
+            return
+
+        data = "".join(self.parts)
+        self.parts = []
+        self.size = 0
+
+        write_frame(self.writer, {
+            "id": self.job_id,
+            "type": "output",
+            "data": data,
+        })
+
+
+# =========================================================
+# WORKER
+# =========================================================
+
+def peak_memory_mb():
+    if resource is None:
+        return 0
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def cpu_seconds(children=False):
+    """User plus system CPU time of this process, or of its reaped
+    children."""
+    if resource is None:
+        t = os.times()
+        if children:
+            return t.children_user + t.children_system
+        return t.user + t.system
+
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    usage = resource.getrusage(who)
+    return usage.ru_utime + usage.ru_stime
+
+
+def limit_address_space(memory_mb):
+    """Hard RLIMIT_AS backstop: allocations past it raise MemoryError."""
+    if resource is None or not memory_mb:
+        return
+
+    limit = memory_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+class Worker:
+    def __init__(self, max_jobs=0, max_memory_mb=0, max_steps=None,
+                 max_memory=None):
+        self.max_jobs = max_jobs
+        self.max_steps = max_steps
+        self.max_memory_mb = max_memory_mb
+        self.max_memory = max_memory
+        self.jobs = 0
+
+    def handle(self, job, writer=None):
+        if job.get("check"):
+            return self.check(job)
+
+        stdout = None
+        if job.get("stream") and writer is not None:
+            stdout = OutputFrames(writer, job.get("id"))
+
+        cpu = cpu_seconds()
+        result = run_source(
+            job.get("code", ""),
+            max_steps=job.get("max_steps", self.max_steps),
+            max_memory=job.get("max_memory", self.max_memory),
+            stdout=stdout,
+            stats=job.get("stats", False),
+        )
+        result["id"] = job.get("id")
+        result["type"] = "result"
+        result["usage"] = {"cpu": cpu_seconds() - cpu}
+
+        self.jobs += 1
+        # After a MemoryError the heap is in an unknown state
+        result["recycle"] = (
+            result["status"] == "memory_error" or self.should_recycle()
+        )
+        return result
+
+    def check(self, job):
+        from quirk.check import check_source
+
+        result = {
+            "id": job.get("id"),
+            "type": "result",
+            "status": "ok",
+            "diagnostics": check_source(job.get("code", "")),
+        }
+
+        self.jobs += 1
+        result["recycle"] = self.should_recycle()
+        return result
+
+    def should_recycle(self):
+        if self.max_jobs and self.jobs >= self.max_jobs:
+            return True
+        if self.max_memory_mb and peak_memory_mb() >= self.max_memory_mb:
+            return True
+        return False
+
+    def serve_stream(self, reader, writer):
+        while True:
+            job = read_frame(reader)
+            if job is None:
+                return False
+
+            result = self.handle(job, writer)
+            write_frame(writer, result)
+
+            if result["recycle"]:
+                return True
+
+
+def serve_stdio(worker):
+    reader = sys.stdin.buffer
+    writer = sys.stdout.buffer
+
+    # Anything else printing to stdout would corrupt the framing
+    sys.stdout = sys.stderr
+
+    worker.serve_stream(reader, writer)
+
+
+def serve_socket(worker, path):
+    if not hasattr(socket, "AF_UNIX"):
+        raise SystemExit("Unix sockets are not supported on this platform")
+
+    if os.path.exists(path):
+        os.unlink(path)
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen()
+
+    try:
+        while True:
+            conn, _ = server.accept()
+            with conn:
+                stream = conn.makefile("rwb")
+                recycle = worker.serve_stream(stream, stream)
+                stream.close()
+            if recycle:
+                return
+    finally:
+        server.close()
+        os.unlink(path)
+
+
+def serve(socket_path=None, max_jobs=0, max_memory_mb=0, max_steps=None,
+          max_memory=None, rlimit_as_mb=0):
+    limit_address_space(rlimit_as_mb)
+
+    worker = Worker(
+        max_jobs=max_jobs,
+        max_memory_mb=max_memory_mb,
+        max_steps=max_steps,
+        max_memory=max_memory,
+    )
+
+    if socket_path:
+        serve_socket(worker, socket_path)
+    else:
+        serve_stdio(worker)
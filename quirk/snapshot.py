@@ -0,0 +1,139 @@
+# quirk/snapshot.py
+
+import hashlib
+import io
+import os
+import pickle
+
+from quirk.stdlib import native_module
+from quirk.values import LazyModule, isolate
+
+
+SNAPSHOT_MAGIC = "quirk-snapshot"
+SNAPSHOT_VERSION = 1
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def file_hash(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+# =========================================================
+# SNAPSHOT
+# Global values and function definitions are pickled as-is.
+# Module namespaces are stored as (name, path, sha256) and
+# reloaded from their source on restore, so their ASTs are
+# not duplicated in the snapshot.
+# =========================================================
+
+class _SnapshotPickler(pickle.Pickler):
+    def __init__(self, file, interpreter):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.module_ids = {
+            id(namespace): name
+            for name, namespace in interpreter.modules.items()
+        }
+        self.module_files = interpreter.module_files
+
+    def persistent_id(self, obj):
+        if isinstance(obj, LazyModule):
+            return ("lazy", obj.name, obj.path, obj.line)
+
+        if isinstance(obj, dict) and id(obj) in self.module_ids:
+            name = self.module_ids[id(obj)]
+            path = self.module_files.get(name)
+            if path is None:
+                return ("native", name)
+            return ("module", name, path, file_hash(path))
+
+        return None
+
+
+class _SnapshotUnpickler(pickle.Unpickler):
+    def __init__(self, file, interpreter):
+        super().__init__(file)
+        self.interpreter = interpreter
+
+    def persistent_load(self, pid):
+        kind = pid[0]
+
+        if kind == "lazy":
+            _, name, path, line = pid
+            return LazyModule(name, path, line)
+
+        if kind == "native":
+            _, name = pid
+            namespace = native_module(name)
+            if namespace is None:
+                raise SnapshotError(f"Native module '{name}' is not available")
+            return self.interpreter.modules.setdefault(name, dict(namespace))
+
+        if kind == "module":
+            _, name, path, digest = pid
+
+            if name in self.interpreter.modules:
+                return self.interpreter.modules[name]
+
+            if not os.path.isfile(path) or file_hash(path) != digest:
+                raise SnapshotError(
+                    f"Module '{name}' ({path}) changed since the snapshot "
+                    "was taken"
+                )
+
+            namespace = isolate(self.interpreter._load_namespace(path))
+            self.interpreter.modules[name] = namespace
+            self.interpreter.module_files[name] = path
+            return namespace
+
+        raise SnapshotError(f"Unknown snapshot reference {kind!r}")
+
+
+def save_snapshot(interpreter, path):
+    if len(interpreter.scopes.scopes) != 1:
+        raise SnapshotError("Snapshots can only be taken at top level")
+
+    state = {
+        "globals": interpreter.scopes.scopes[0],
+        "functions": interpreter.functions,
+        "modules": interpreter.modules,
+    }
+
+    buffer = io.BytesIO()
+    try:
+        _SnapshotPickler(buffer, interpreter).dump(state)
+    except (pickle.PicklingError, TypeError, AttributeError) as e:
+        raise SnapshotError(f"Cannot snapshot interpreter state: {e}")
+
+    with open(path, "wb") as f:
+        f.write(f"{SNAPSHOT_MAGIC} {SNAPSHOT_VERSION}\n".encode("ascii"))
+        f.write(buffer.getvalue())
+
+
+def load_snapshot(interpreter, path):
+    # Snapshots are pickles: only restore files you created yourself
+    with open(path, "rb") as f:
+        header = f.readline().decode("ascii", "replace").split()
+
+        if len(header) != 2 or header[0] != SNAPSHOT_MAGIC:
+            raise SnapshotError(f"'{path}' is not a quirk snapshot")
+
+        if header[1] != str(SNAPSHOT_VERSION):
+            raise SnapshotError(
+                f"Unsupported snapshot version {header[1]} "
+                f"(expected {SNAPSHOT_VERSION})"
+            )
+
+        try:
+            state = _SnapshotUnpickler(f, interpreter).load()
+        except SnapshotError:
+            raise
+        except Exception as e:
+            raise SnapshotError(f"Corrupt snapshot '{path}': {e}")
+
+    interpreter.scopes.scopes[0].update(state["globals"])
+    interpreter.functions.update(state["functions"])
+    interpreter.modules.update(state["modules"])
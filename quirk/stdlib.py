@@ -0,0 +1,117 @@
+# quirk/stdlib.py
+
+import collections
+import math
+import string
+import threading
+import time
+from types import MappingProxyType
+
+from quirk.values import mutate
+
+
+# =========================================================
+# NATIVE MODULES
+# Python-implemented modules resolved by load_module before
+# the .sl search path. A same-named .sl file found on the
+# path is layered over the native namespace.
+# =========================================================
+
+def _math():
+    return {
+        name: getattr(math, name)
+        for name in dir(math)
+        if not name.startswith("_")
+    }
+
+
+def _check_fields(template):
+    # Attribute and index lookups in a field ("{0.__globals__}") would
+    # let programs walk Python objects; only "{}" and "{N}" are allowed,
+    # including in nested format specs
+    for _, field, spec, _ in string.Formatter().parse(template):
+        if field is None:
+            continue
+        if "." in field or "[" in field:
+            raise ValueError(f"Unsupported format field '{{{field}}}'")
+        if spec:
+            _check_fields(spec)
+
+
+def _format(template, *args):
+    _check_fields(template)
+    return template.format(*args)
+
+
+def _strings():
+    return {
+        "split": lambda s, sep=None: s.split(sep),
+        "join": lambda sep, items: sep.join(str(i) for i in items),
+        "replace": lambda s, old, new: s.replace(old, new),
+        "format": _format,
+        "upper": str.upper,
+        "lower": str.lower,
+        "strip": str.strip,
+        "startswith": str.startswith,
+        "endswith": str.endswith,
+        "find": str.find,
+        "contains": lambda s, sub: sub in s,
+        "str": str,
+    }
+
+
+def _collections():
+    return {
+        "counter": collections.Counter,
+        "most_common": lambda c, n=None: c.most_common(n),
+        "deque": collections.deque,
+        # In place, so list views of the argument must be detached
+        "append": lambda d, x: mutate(d, "append", x),
+        "appendleft": lambda d, x: mutate(d, "appendleft", x),
+        "pop": lambda d: mutate(d, "pop"),
+        "popleft": lambda d: mutate(d, "popleft"),
+    }
+
+
+def _time():
+    return {
+        "perf_counter": time.perf_counter,
+        "time": time.time,
+        "monotonic": time.monotonic,
+    }
+
+
+# name -> (factory, deterministic)
+NATIVE_MODULES = {
+    "math": (_math, True),
+    "strings": (_strings, True),
+    "collections": (_collections, True),
+    "time": (_time, False),
+}
+
+_namespaces = {}
+_namespaces_lock = threading.Lock()
+
+
+def native_module(name):
+    """Read-only namespace of the native module ``name``, or None.
+
+    Shared by every interpreter; importers bind a copy.
+    """
+    entry = NATIVE_MODULES.get(name)
+    if entry is None:
+        return None
+
+    namespace = _namespaces.get(name)
+    if namespace is None:
+        with _namespaces_lock:
+            namespace = _namespaces.get(name)
+            if namespace is None:
+                namespace = MappingProxyType(entry[0]())
+                _namespaces[name] = namespace
+    return namespace
+
+
+def is_deterministic(name):
+    entry = NATIVE_MODULES.get(name)
+    return entry is None or entry[1]
@@ -0,0 +1,278 @@
+# quirk/values.py
+
+import copy
+import threading
+import weakref
+from collections.abc import Sequence
+
+
+# =========================================================
+# LIST VIEWS
+# Views read straight from their base list, so a list must
+# never change in place while views of it are alive. Every
+# in-place change goes through set_item or mutate, which
+# detach the views first.
+# =========================================================
+
+# id(base list) -> {id(view): weakref} for views sharing its storage.
+# Shared by every interpreter in the process, so all access holds
+# _VIEWS_LOCK; it is reentrant because weakref callbacks may fire
+# from a collection triggered while it is held.
+_VIEWS = {}
+_VIEWS_LOCK = threading.RLock()
+
+
+def _forget(key, view_id):
+    with _VIEWS_LOCK:
+        views = _VIEWS.get(key)
+        if views is not None:
+            views.pop(view_id, None)
+            if not views:
+                del _VIEWS[key]
+
+
+class ListView(Sequence):
+    """Slice of a list that shares the list's storage until written to."""
+
+    __slots__ = ("_base", "_range", "_ref", "__weakref__")
+
+    def __init__(self, base, indices):
+        self._base = base
+        self._range = indices
+        self._ref = None
+        self._attach()
+
+    def _attach(self):
+        key = id(self._base)
+        view_id = id(self)
+        self._ref = weakref.ref(self, lambda ref: _forget(key, view_id))
+        with _VIEWS_LOCK:
+            _VIEWS.setdefault(key, {})[view_id] = self._ref
+
+    def _detach(self):
+        base = self._base
+        self._base = [base[i] for i in self._range]
+        self._range = range(len(self._base))
+        _forget(id(base), id(self))
+        self._ref = None
+
+    # -----------------------------------------------------
+    # Reads
+    # -----------------------------------------------------
+
+    def __len__(self):
+        return len(self._range)
+
+    def __iter__(self):
+        base = self._base
+        for i in self._range:
+            yield base[i]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ListView(self._base, self._range[index])
+        return self._base[self._range[index]]
+
+    def to_list(self):
+        return [self._base[i] for i in self._range]
+
+    # -----------------------------------------------------
+    # Writes (copy on write)
+    # -----------------------------------------------------
+
+    def __setitem__(self, index, value):
+        if self._ref is not None:
+            self._detach()
+        set_item(self._base, index, value)
+
+    def _mutate(self, method, args):
+        if self._ref is not None:
+            self._detach()
+        # Once detached the view spans all of its own list
+        base = self._base
+        result = mutate(base, method, *args)
+        self._range = range(len(base))
+        return result
+
+    # -----------------------------------------------------
+    # List compatibility
+    # -----------------------------------------------------
+
+    def __eq__(self, other):
+        if isinstance(other, (list, ListView)):
+            return len(self) == len(other) and all(
+                a == b for a, b in zip(self, other)
+            )
+        return NotImplemented
+
+    def __lt__(self, other):
+        if isinstance(other, (list, ListView)):
+            return self.to_list() < list(other)
+        return NotImplemented
+
+    def __gt__(self, other):
+        if isinstance(other, (list, ListView)):
+            return self.to_list() > list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __add__(self, other):
+        if isinstance(other, (list, ListView)):
+            return self.to_list() + list(other)
+        return NotImplemented
+
+    def __radd__(self, other):
+        if isinstance(other, list):
+            return other + self.to_list()
+        return NotImplemented
+
+    def __mul__(self, count):
+        return self.to_list() * count
+
+    __rmul__ = __mul__
+
+    def __repr__(self):
+        return repr(self.to_list())
+
+    def __reduce__(self):
+        return (list, (self.to_list(),))
+
+
+def make_slice(seq, start, stop, step):
+    """Slice ``seq``; lists and list views produce a zero-copy ListView."""
+    s = slice(start, stop, step)
+
+    if isinstance(seq, list):
+        return ListView(seq, range(len(seq))[s])
+
+    if isinstance(seq, ListView):
+        return seq[s]
+
+    return seq[s]
+
+
+def detach_views(seq):
+    """Give every live view of list ``seq`` its own copy of its items.
+
+    Call before changing ``seq`` in place.
+    """
+    with _VIEWS_LOCK:
+        views = _VIEWS.get(id(seq))
+        refs = list(views.values()) if views else ()
+
+    for ref in refs:
+        view = ref()
+        if view is not None and view._base is seq:
+            view._detach()
+
+
+def set_item(seq, index, value):
+    """Store ``value`` at ``index``, detaching any views of a list first."""
+    if isinstance(seq, list):
+        detach_views(seq)
+    seq[index] = value
+
+
+def mutate(seq, method, *args):
+    """Call ``seq.method(*args)`` for a method that changes ``seq`` in
+    place (append, pop, ...), detaching views of a list first.
+
+    A view is first given its own copy, which the call then changes.
+    """
+    if isinstance(seq, ListView):
+        return seq._mutate(method, args)
+
+    if isinstance(seq, list):
+        detach_views(seq)
+    return getattr(seq, method)(*args)
+
+
+# =========================================================
+# ISOLATION
+# =========================================================
+
+def isolate(value, memo=None):
+    """Copy the mutable containers reachable from ``value``.
+
+    Functions, modules' callables and immutable values are shared.
+    Used to give each interpreter its own copy of a cached module's
+    data, so one program cannot change it for another.
+    """
+    if memo is None:
+        memo = {}
+
+    kind = type(value)
+    if kind in (int, float, str, bool, type(None)):
+        return value
+
+    done = memo.get(id(value))
+    if done is not None:
+        return done
+
+    if isinstance(value, dict):
+        result = memo[id(value)] = copy.copy(value)
+        for key, item in value.items():
+            result[key] = isolate(item, memo)
+        return result
+
+    if isinstance(value, list):
+        result = memo[id(value)] = copy.copy(value)
+        for i, item in enumerate(value):
+            result[i] = isolate(item, memo)
+        return result
+
+    if isinstance(value, ListView):
+        result = memo[id(value)] = isolate(value.to_list(), memo)
+        return result
+
+    if isinstance(value, tuple):
+        result = memo[id(value)] = tuple(isolate(item, memo) for item in value)
+        return result
+
+    if isinstance(value, (set, bytearray)) or hasattr(value, "__copy__"):
+        # Set members are hashable, hence already immutable
+        result = memo[id(value)] = copy.copy(value)
+        return result
+
+    return value
+
+
+# =========================================================
+# LAZY MODULES
+# =========================================================
+
+class LazyModule:
+    """Module binding whose file is only loaded on first attribute access.
+
+    It is loaded by the interpreter that first uses it, so imports
+    reached through a cached module's namespace are recorded (and
+    revalidated) for the program using them. Copies start unloaded:
+    each program gets its own namespace.
+    """
+
+    __slots__ = ("name", "path", "line", "namespace", "_lock")
+
+    def __init__(self, name, path, line):
+        self.name = name
+        self.path = path
+        self.line = line
+        self.namespace = None
+        self._lock = threading.RLock()
+
+    def resolve(self, loader):
+        namespace = self.namespace
+        if namespace is not None:
+            return namespace
+
+        with self._lock:
+            if self.namespace is None:
+                self.namespace = loader(self)
+            return self.namespace
+
+    def __copy__(self):
+        return LazyModule(self.name, self.path, self.line)
+
+    def __repr__(self):
+        state = "loaded" if self.namespace is not None else "not loaded"
+        return f"<module '{self.name}' ({state})>"
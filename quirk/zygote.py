@@ -0,0 +1,221 @@
+# quirk/zygote.py
+
+import gc
+import json
+import os
+import select
+import signal
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from quirk.ast_interpreter import Interpreter
+from quirk.modules import find_module, registry
+from quirk.runner import run_source
+from quirk.serve import (
+    HEADER, OutputFrames, Worker, cpu_seconds, limit_address_space,
+    serve_socket, serve_stdio, write_frame
+)
+
+
+# =========================================================
+# ZYGOTE
+# A warm parent that forks one child per program. Children
+# inherit the loaded interpreter and preloaded modules
+# copy-on-write, run under resource limits and report back
+# over a pipe. Children never write to the parent's stdout:
+# their output frames come through the pipe too, and only
+# whole frames are passed on, so a child killed mid-write
+# cannot corrupt the stream.
+# =========================================================
+
+def preload_modules(names):
+    loader = Interpreter()
+
+    for name in names:
+        path = find_module(name)
+        if path is None:
+            raise SystemExit(f"zygote: module '{name}' not found")
+        registry.load(path, loader._execute_module)
+
+
+def apply_limits(cpu_seconds, memory_mb):
+    if resource is None:
+        return
+
+    if cpu_seconds:
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 1))
+
+    limit_address_space(memory_mb)
+
+
+class Zygote(Worker):
+    def __init__(self, max_steps=None, cpu_seconds=5, memory_mb=256,
+                 timeout=10.0, max_memory=None):
+        super().__init__(max_steps=max_steps, max_memory=max_memory)
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self.timeout = timeout
+
+    def handle(self, job, writer=None):
+        read_fd, write_fd = os.pipe()
+        cpu = cpu_seconds(children=True)
+
+        start = time.perf_counter()
+        pid = os.fork()
+        forked = time.perf_counter() - start
+
+        if pid == 0:
+            os.close(read_fd)
+            self._run_child(job, writer, write_fd)
+
+        os.close(write_fd)
+        reported, timed_out = self._read_frames(read_fd, writer)
+        os.close(read_fd)
+
+        if timed_out:
+            os.kill(pid, signal.SIGKILL)
+        _, status = os.waitpid(pid, 0)
+
+        result = self._decode(reported, status, timed_out)
+        result["id"] = job.get("id")
+        result["type"] = "result"
+        result["recycle"] = False
+        # Counted once the child is reaped, so killed runs are included
+        result["usage"] = {
+            "cpu": cpu_seconds(children=True) - cpu,
+            "fork": forked,
+        }
+
+        self.jobs += 1
+        return result
+
+    def _run_child(self, job, writer, write_fd):
+        code = 1
+        try:
+            apply_limits(self.cpu_seconds, self.memory_mb)
+            pipe = os.fdopen(write_fd, "wb")
+
+            stdout = None
+            if job.get("stream") and writer is not None:
+                stdout = OutputFrames(pipe, job.get("id"))
+
+            result = run_source(
+                job.get("code", ""),
+                max_steps=job.get("max_steps", self.max_steps),
+                max_memory=job.get("max_memory", self.max_memory),
+                stdout=stdout,
+                stats=job.get("stats", False),
+            )
+
+            write_frame(pipe, {"type": "result", "result": result})
+            code = 0
+        finally:
+            # Never fall back into the parent's serve loop
+            os._exit(code)
+
+    def _read_frames(self, fd, writer):
+        """Read the child's frames until it closes the pipe or the
+        timeout passes, passing output frames on to ``writer``.
+
+        Returns (result, timed_out); result is None if the child died
+        before reporting. A partial frame left by a killed child is
+        dropped.
+        """
+        buffer = bytearray()
+        result = None
+        deadline = time.monotonic() + self.timeout
+
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return result, True
+
+            ready, _, _ = select.select([fd], [], [], remaining)
+            if not ready:
+                continue
+
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                return result, False
+            buffer += chunk
+
+            while len(buffer) >= HEADER.size:
+                (length,) = HEADER.unpack_from(buffer)
+                end = HEADER.size + length
+                if len(buffer) < end:
+                    break
+
+                frame = bytes(buffer[:end])
+                del buffer[:end]
+                message = json.loads(frame[HEADER.size:].decode("utf-8"))
+
+                if message.get("type") == "output":
+                    if writer is not None:
+                        writer.write(frame)
+                        writer.flush()
+                else:
+                    result = message.get("result")
+
+    def _decode(self, result, status, timed_out):
+        if timed_out:
+            return self._failure("timeout", "Time limit exceeded.")
+
+        if os.WIFSIGNALED(status):
+            sig = os.WTERMSIG(status)
+            if sig in (signal.SIGXCPU, signal.SIGKILL):
+                return self._failure("timeout", "Time limit exceeded.")
+            return self._failure(
+                "internal_error",
+                f"Internal Error: Program killed by signal {sig}."
+            )
+
+        if result is None:
+            # The child died before it could report, e.g. while
+            # serializing a result under RLIMIT_AS
+            return self._failure(
+                "internal_error",
+                "Internal Error: Program exited without a result."
+            )
+        return result
+
+    @staticmethod
+    def _failure(status, message):
+        return {
+            "status": status,
+            "output": "",
+            "error": message,
+            "line": None,
+            "cacheable": False,
+        }
+
+
+def zygote(socket_path=None, preload=(), max_steps=None, cpu_seconds=5,
+           memory_mb=256, timeout=10.0, max_memory=None):
+    if not hasattr(os, "fork"):
+        raise SystemExit("quirk zygote requires os.fork (not available here)")
+
+    preload_modules(preload)
+
+    # Warm the interpreter paths once in the parent
+    run_source("x = [1, 2, 3]\nprint x[1:]\n")
+
+    worker = Zygote(
+        max_steps=max_steps,
+        cpu_seconds=cpu_seconds,
+        memory_mb=memory_mb,
+        timeout=timeout,
+        max_memory=max_memory,
+    )
+
+    # Keep the warm heap out of the collector so children do not
+    # dirty its pages when they collect
+    gc.freeze()
+
+    if socket_path:
+        serve_socket(worker, socket_path)
+    else:
+        serve_stdio(worker)
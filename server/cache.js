@@ -0,0 +1,134 @@
+const crypto = require("crypto")
+const fs = require("fs")
+const path = require("path")
+
+// --------------------------------------------------
+// INTERPRETER VERSION
+// Hash of the interpreter sources and bundled .sl modules,
+// so results are never served across interpreter changes
+// --------------------------------------------------
+
+function interpreterVersion(projectRoot) {
+  const hash = crypto.createHash("sha256")
+
+  const files = [
+    ...fs.readdirSync(path.join(projectRoot, "quirk"))
+      .filter((f) => f.endsWith(".py"))
+      .map((f) => path.join(projectRoot, "quirk", f)),
+    ...fs.readdirSync(projectRoot)
+      .filter((f) => f.endsWith(".sl"))
+      .map((f) => path.join(projectRoot, f)),
+  ].sort()
+
+  for (const file of files) {
+    hash.update(file)
+    hash.update(fs.readFileSync(file))
+  }
+
+  return hash.digest("hex").slice(0, 16)
+}
+
+// A result is only valid while the .sl modules the run loaded
+// (reported by the worker as [path, mtime_ns, size]) are unchanged
+function modulesUnchanged(modules = []) {
+  return modules.every(([file, mtimeNs, size]) => {
+    try {
+      const st = fs.statSync(file, { bigint: true })
+      return String(st.mtimeNs) === mtimeNs && Number(st.size) === size
+    } catch (err) {
+      return false
+    }
+  })
+}
+
+// --------------------------------------------------
+// RESULT CACHE
+// LRU over a Map (insertion order = recency), bounded by
+// entry count and total bytes, with a per-entry TTL.
+// Entries are dropped once an imported module changes.
+// --------------------------------------------------
+
+class ResultCache {
+  constructor({
+    version,
+    maxEntries = 1000,
+    maxBytes = 32 * 1024 * 1024,
+    ttl = 10 * 60 * 1000,
+  } = {}) {
+    this.version = version
+    this.maxEntries = maxEntries
+    this.maxBytes = maxBytes
+    this.ttl = ttl
+
+    this.entries = new Map()
+    this.bytes = 0
+    this.hits = 0
+    this.misses = 0
+    this.evictions = 0
+  }
+
+  key(code, settings = "") {
+    return crypto
+      .createHash("sha256")
+      .update(this.version)
+      .update("\0")
+      .update(settings)
+      .update("\0")
+      .update(code)
+      .digest("hex")
+  }
+
+  get(key) {
+    const entry = this.entries.get(key)
+
+    if (!entry || entry.expires < Date.now()
+        || !modulesUnchanged(entry.result.modules)) {
+      if (entry) this.delete(key)
+      this.misses++
+      return null
+    }
+
+    this.entries.delete(key)
+    this.entries.set(key, entry)
+    this.hits++
+    return entry.result
+  }
+
+  set(key, result) {
+    if (!result.cacheable) return
+
+    const size = Buffer.byteLength(result.output || "") + Buffer.byteLength(result.error || "")
+    if (size > this.maxBytes) return
+
+    if (this.entries.has(key)) this.delete(key)
+
+    this.entries.set(key, { result, size, expires: Date.now() + this.ttl })
+    this.bytes += size
+
+    while (this.entries.size > this.maxEntries || this.bytes > this.maxBytes) {
+      this.delete(this.entries.keys().next().value)
+      this.evictions++
+    }
+  }
+
+  delete(key) {
+    const entry = this.entries.get(key)
+    if (!entry) return
+
+    this.bytes -= entry.size
+    this.entries.delete(key)
+  }
+
+  stats() {
+    return {
+      version: this.version,
+      entries: this.entries.size,
+      bytes: this.bytes,
+      hits: this.hits,
+      misses: this.misses,
+      evictions: this.evictions,
+    }
+  }
+}
+
+module.exports = { ResultCache, interpreterVersion }
@@ -1,61 +1,393 @@
 const express = require("express")
 const cors = require("cors")
-const { exec } = require("child_process")
-const fs = require("fs")
 const path = require("path")
+const { WorkerPool } = require("./pool")
+const { ResultCache, interpreterVersion } = require("./cache")
+const { Scheduler, QueueFullError } = require("./scheduler")
+const { Registry, LATENCY_BUCKETS, SIZE_BUCKETS } = require("./metrics")
 
 const app = express()
 
+// Behind a reverse proxy every request comes from the proxy's address,
+// which would put all users under one client quota. QUIRK_TRUST_PROXY
+// takes Express's "trust proxy" values: "true", a hop count, or the
+// proxies' addresses/subnets, comma-separated.
+const trustProxy = (value) => {
+  if (value === undefined || value === "") return false
+  if (value === "true" || value === "false") return value === "true"
+  if (/^\d+$/.test(value)) return parseInt(value, 10)
+  return value.split(",").map((s) => s.trim())
+}
+
+app.set("trust proxy", trustProxy(process.env.QUIRK_TRUST_PROXY))
+
 app.use(cors())
 app.use(express.json())
 
+const projectRoot = path.join(__dirname, "..")
+
 // --------------------------------------------------
-// RUN CODE API
+// METRICS
+// Declared before the pools so worker spawns are counted
 // --------------------------------------------------
 
-app.post("/run", (req, res) => {
-  const code = req.body.code || ""
+const metrics = new Registry()
+
+const runsTotal = metrics.counter(
+  "quirk_runs_total",
+  "Runs answered, by route, outcome and whether the cache served them",
+  ["route", "status", "cached"]
+)
+const runSeconds = metrics.histogram(
+  "quirk_run_duration_seconds",
+  "Time from receiving a run request to having its result, queue wait included",
+  ["route", "cached"],
+  LATENCY_BUCKETS
+)
+const queueSeconds = metrics.histogram(
+  "quirk_queue_wait_seconds",
+  "Time runs spent waiting for admission",
+  [],
+  LATENCY_BUCKETS
+)
+const spawnSeconds = metrics.histogram(
+  "quirk_spawn_seconds",
+  "Time to start a worker process, or to fork a zygote child per run",
+  ["kind"],
+  LATENCY_BUCKETS
+)
+const phaseSeconds = metrics.histogram(
+  "quirk_phase_seconds",
+  "Wall time of each interpreter phase, as reported by the worker",
+  ["phase"],
+  LATENCY_BUCKETS
+)
+const outputBytes = metrics.histogram(
+  "quirk_output_bytes",
+  "Size of program output",
+  [],
+  SIZE_BUCKETS
+)
+const cpuSeconds = metrics.counter(
+  "quirk_worker_cpu_seconds_total",
+  "CPU time spent running programs in worker processes",
+  []
+)
+
+const pool = new WorkerPool({
+  cwd: projectRoot,
+  mode: process.env.QUIRK_WORKER_MODE || undefined,
+  preload: (process.env.QUIRK_PRELOAD || "").split(",").filter(Boolean),
+  size: parseInt(process.env.QUIRK_WORKERS, 10) || undefined,
+  maxJobs: parseInt(process.env.QUIRK_WORKER_MAX_JOBS, 10) || undefined,
+  maxMemoryMb: parseInt(process.env.QUIRK_WORKER_MAX_MEMORY_MB, 10) || undefined,
+  rlimitAsMb: parseInt(process.env.QUIRK_WORKER_RLIMIT_AS_MB, 10) || undefined,
+  maxSteps: parseInt(process.env.QUIRK_MAX_STEPS, 10) || 10000000,
+  maxProgramMemoryMb: parseInt(process.env.QUIRK_MAX_MEMORY_MB, 10) || 128,
+  // Phase timings feed /metrics; QUIRK_LOG_STATS also logs them
+  stats: true,
+  onSpawn: (seconds) => spawnSeconds.observe({ kind: "worker" }, seconds),
+})
+
+// Runs are admitted here before they reach the pool, so bursts
+// queue fairly per client and overflow is refused with a 429
+const scheduler = new Scheduler({
+  concurrency: parseInt(process.env.QUIRK_MAX_CONCURRENCY, 10) || pool.options.size,
+  maxQueue: parseInt(process.env.QUIRK_MAX_QUEUE, 10) || undefined,
+  maxPerClient: parseInt(process.env.QUIRK_MAX_QUEUE_PER_CLIENT, 10) || undefined,
+})
+
+// Quotas and fairness are per address: the session header is chosen
+// by the caller, so it only orders runs within that address's share.
+// Behind a proxy, set QUIRK_TRUST_PROXY so req.ip is the user's.
+const clientId = (req) => req.ip
+const sessionId = (req) => req.get("X-Quirk-Session") || ""
 
-  const projectRoot = path.join(__dirname, "..")
-  const filePath = path.join(projectRoot, "temp.qk")
+// Queue `task` for this request on `queue`. Returns the scheduler's
+// promise, or null after answering 429 when there is no room. Runs
+// still queued when the client goes away are dropped.
+const admit = (req, res, task, queue = scheduler) => {
+  const controller = new AbortController()
+  res.on("close", () => {
+    if (!res.writableFinished) controller.abort()
+  })
 
   try {
-    fs.writeFileSync(filePath, code)
+    return queue.submit(clientId(req), task, {
+      signal: controller.signal,
+      session: sessionId(req),
+    })
   } catch (err) {
-    return res.json({
+    if (!(err instanceof QueueFullError)) throw err
+
+    res.status(429).set("Retry-After", "1").json({
       error: true,
-      message: "Failed to write temporary file.",
+      status: "busy",
+      message: err.message,
+      line: null,
     })
+    return null
+  }
+}
+
+// Wait for an admitted run; null if it was cancelled while queued
+const settle = async (scheduled) => {
+  try {
+    return await scheduled
+  } catch (err) {
+    if (err.name === "AbortError") return null
+    throw err
+  }
+}
+
+// Diagnostics get their own workers so they never queue behind
+// running programs
+const checker = new WorkerPool({
+  cwd: projectRoot,
+  size: parseInt(process.env.QUIRK_CHECK_WORKERS, 10) || 1,
+  timeout: 2000,
+})
+
+// ...and their own admission queue, with the same per-client limits
+const checkScheduler = new Scheduler({
+  concurrency: checker.options.size,
+  maxQueue: parseInt(process.env.QUIRK_MAX_QUEUE, 10) || undefined,
+  maxPerClient: parseInt(process.env.QUIRK_MAX_QUEUE_PER_CLIENT, 10) || undefined,
+})
+
+const logStats = (route, result) => {
+  if (!result.stats || !process.env.QUIRK_LOG_STATS) return
+  console.log(JSON.stringify({ route, status: result.status, ...result.stats }))
+}
+
+const seconds = (since) => Number(process.hrtime.bigint() - since) / 1e9
+
+// Record one answered run. `run` is the scheduler's { value, waitMs }
+// for executed runs and null for cache hits; `outputSize` in bytes.
+const observe = (route, since, result, run, outputSize) => {
+  const cached = String(!run)
+
+  runsTotal.inc({ route, status: result.status, cached })
+  runSeconds.observe({ route, cached }, seconds(since))
+  if (!run) return
+
+  queueSeconds.observe({}, run.waitMs / 1000)
+  outputBytes.observe({}, outputSize)
+
+  const { usage, stats } = result
+  if (usage) {
+    cpuSeconds.inc({}, usage.cpu)
+    if (usage.fork !== undefined) spawnSeconds.observe({ kind: "fork" }, usage.fork)
+  }
+
+  const timings = (stats && stats.timings) || {}
+  for (const [phase, timing] of Object.entries(timings)) {
+    // "import" is reported even for programs that import nothing
+    if (timing.wall > 0) phaseSeconds.observe({ phase }, timing.wall)
+  }
+}
+
+const cache = new ResultCache({
+  version: interpreterVersion(projectRoot),
+  maxEntries: parseInt(process.env.QUIRK_CACHE_ENTRIES, 10) || undefined,
+  maxBytes: parseInt(process.env.QUIRK_CACHE_BYTES, 10) || undefined,
+  ttl: parseInt(process.env.QUIRK_CACHE_TTL_MS, 10) || undefined,
+})
+
+metrics.gauge(
+  "quirk_runs_in_flight",
+  "Runs currently executing",
+  [],
+  () => scheduler.stats().running
+)
+metrics.gauge(
+  "quirk_runs_queued",
+  "Runs admitted and waiting for a worker",
+  [],
+  () => scheduler.stats().queued
+)
+metrics.counter(
+  "quirk_admissions_total",
+  "Run requests by admission decision",
+  ["decision"],
+  () => {
+    const { admitted, rejected, cancelled } = scheduler.stats()
+    return [
+      [{ decision: "admitted" }, admitted],
+      [{ decision: "rejected" }, rejected],
+      [{ decision: "cancelled" }, cancelled],
+    ]
+  }
+)
+metrics.counter(
+  "quirk_cache_lookups_total",
+  "Result cache lookups by outcome",
+  ["result"],
+  () => {
+    const { hits, misses } = cache.stats()
+    return [[{ result: "hit" }, hits], [{ result: "miss" }, misses]]
+  }
+)
+
+const cacheKey = (code) => cache.key(
+  code,
+  `${pool.options.maxSteps}:${pool.options.maxProgramMemoryMb}`
+)
+
+// --------------------------------------------------
+// RUN CODE API
+// --------------------------------------------------
+
+app.post("/run", async (req, res) => {
+  const since = process.hrtime.bigint()
+  const code = req.body.code || ""
+  const key = cacheKey(code)
+
+  let result = cache.get(key)
+  let run = null
+  let queueMs = 0
+
+  if (!result) {
+    const scheduled = admit(req, res, () => pool.run(code))
+    if (!scheduled) return
+
+    run = await settle(scheduled)
+    if (!run) return
+
+    result = run.value
+    queueMs = run.waitMs
+    logStats("/run", result)
+    cache.set(key, result)
   }
 
-  exec(
-    `python -m quirk.cli run temp.qk`,
-    { timeout: 5000, cwd: projectRoot },
-    (err, stdout, stderr) => {
+  const output = result.output || ""
+  observe("/run", since, result, run, Buffer.byteLength(output))
 
-      const raw = (stdout + stderr).trim()
+  if (result.status === "ok") {
+    return res.json({ output: output.trim(), queueMs })
+  }
 
-      // If nothing returned
-      if (!raw) {
-        return res.json({ output: "" })
-      }
+  return res.json({
+    error: true,
+    status: result.status,
+    message: (output + result.error).trim(),
+    line: result.line,
+    queueMs,
+  })
+})
 
-      // Match "(line X)"
-      const match = raw.match(/\(line\s+(\d+)\)/i)
+// --------------------------------------------------
+// STREAMING RUN API (Server-Sent Events)
+// --------------------------------------------------
 
-      if (match) {
-        return res.json({
-          error: true,
-          message: raw,
-          line: parseInt(match[1], 10)
-        })
-      }
+app.post("/run/stream", async (req, res) => {
+  const since = process.hrtime.bigint()
+  const code = req.body.code || ""
+  const key = cacheKey(code)
+  let result = cache.get(key)
 
-      return res.json({
-        output: raw
-      })
+  const send = (event, data) => {
+    if (!res.writableEnded) {
+      res.write(`event: ${event}\ndata: ${JSON.stringify(data)}\n\n`)
     }
+  }
+
+  // Kept only while the output could still fit in the cache, so
+  // large streams are not held in server memory
+  let chunks = []
+  let streamedBytes = 0
+  let scheduled = null
+
+  if (!result) {
+    scheduled = admit(req, res, () => pool.run(code, {
+      onOutput: (chunk) => {
+        streamedBytes += Buffer.byteLength(chunk)
+        if (chunks && streamedBytes > cache.maxBytes) chunks = null
+        if (chunks) chunks.push(chunk)
+        send("output", chunk)
+      },
+    }))
+    if (!scheduled) return
+  }
+
+  res.writeHead(200, {
+    "Content-Type": "text/event-stream",
+    "Cache-Control": "no-cache",
+    Connection: "keep-alive",
+  })
+  res.flushHeaders()
+
+  let run = null
+  let queueMs = 0
+
+  if (result) {
+    if (result.output) send("output", result.output)
+  } else {
+    run = await settle(scheduled)
+    if (!run) return
+
+    result = {
+      ...run.value,
+      output: chunks ? chunks.join("") : "",
+      cacheable: Boolean(chunks) && run.value.cacheable,
+    }
+    queueMs = run.waitMs
+    logStats("/run/stream", result)
+    cache.set(key, result)
+  }
+
+  const outputSize = run ? streamedBytes : Buffer.byteLength(result.output || "")
+  observe("/run/stream", since, result, run, outputSize)
+
+  send("status", {
+    status: result.status,
+    message: result.error,
+    line: result.line,
+    queueMs,
+  })
+  res.end()
+})
+
+// --------------------------------------------------
+// DIAGNOSTICS API
+// Lex, parse and static checks only; never executes
+// --------------------------------------------------
+
+app.post("/check", async (req, res) => {
+  const scheduled = admit(
+    req, res, () => checker.run(req.body.code || "", { check: true }), checkScheduler
   )
+  if (!scheduled) return
+
+  const run = await settle(scheduled)
+  if (!run) return
+
+  const result = run.value
+
+  res.json({
+    status: result.status,
+    diagnostics: result.diagnostics || [],
+  })
+})
+
+// --------------------------------------------------
+// CACHE STATS
+// --------------------------------------------------
+
+app.get("/cache/stats", (req, res) => {
+  res.json(cache.stats())
+})
+
+app.get("/scheduler/stats", (req, res) => {
+  res.json(scheduler.stats())
+})
+
+// --------------------------------------------------
+// PROMETHEUS METRICS
+// --------------------------------------------------
+
+app.get("/metrics", (req, res) => {
+  res.type("text/plain; version=0.0.4").send(metrics.render())
 })
 
 
@@ -0,0 +1,169 @@
+// --------------------------------------------------
+// METRICS
+// A small Prometheus text-format registry: counters,
+// gauges and histograms with labels. Counters and gauges
+// may instead read their values at scrape time from
+// stats the server already keeps.
+// --------------------------------------------------
+
+const escape = (value) =>
+  String(value).replace(/\\/g, "\\\\").replace(/\n/g, "\\n").replace(/"/g, '\\"')
+
+const formatLabels = (labels) => {
+  const pairs = Object.entries(labels)
+  if (!pairs.length) return ""
+  return `{${pairs.map(([k, v]) => `${k}="${escape(v)}"`).join(",")}}`
+}
+
+// Series are keyed by their label values in labelNames order
+const seriesKey = (labelNames, labels) =>
+  labelNames.map((name) => String(labels[name] ?? "")).join("\u0000")
+
+class Metric {
+  // collect() returns a number, or [labels, value] pairs, read on
+  // every scrape
+  constructor(type, name, help, labelNames = [], collect = null) {
+    this.type = type
+    this.name = name
+    this.help = help
+    this.labelNames = labelNames
+    this.collect = collect
+    this.series = new Map() // key -> { labels, value }
+  }
+
+  get(labels = {}) {
+    const key = seriesKey(this.labelNames, labels)
+    let entry = this.series.get(key)
+    if (!entry) {
+      const picked = {}
+      for (const name of this.labelNames) picked[name] = labels[name] ?? ""
+      entry = { labels: picked, value: this.initial() }
+      this.series.set(key, entry)
+    }
+    return entry
+  }
+
+  initial() {
+    return 0
+  }
+
+  header() {
+    return [`# HELP ${this.name} ${this.help}`, `# TYPE ${this.name} ${this.type}`]
+  }
+
+  set(labels, value) {
+    this.get(labels).value = value
+  }
+
+  render() {
+    if (this.collect) {
+      const values = this.collect()
+      const pairs = Array.isArray(values) ? values : [[{}, values]]
+      for (const [labels, value] of pairs) this.set(labels, value)
+    }
+
+    const lines = this.header()
+    for (const { labels, value } of this.series.values()) {
+      lines.push(`${this.name}${formatLabels(labels)} ${value}`)
+    }
+    return lines
+  }
+}
+
+class Counter extends Metric {
+  constructor(name, help, labelNames, collect) {
+    super("counter", name, help, labelNames, collect)
+  }
+
+  inc(labels, amount = 1) {
+    this.get(labels).value += amount
+  }
+}
+
+class Gauge extends Metric {
+  constructor(name, help, labelNames, collect) {
+    super("gauge", name, help, labelNames, collect)
+  }
+}
+
+class Histogram extends Metric {
+  constructor(name, help, labelNames, buckets) {
+    super("histogram", name, help, labelNames)
+    this.buckets = buckets
+  }
+
+  initial() {
+    return { counts: new Array(this.buckets.length).fill(0), sum: 0, count: 0 }
+  }
+
+  observe(labels, value) {
+    const { value: h } = this.get(labels)
+    const i = this.buckets.findIndex((bound) => value <= bound)
+    if (i !== -1) h.counts[i]++
+    h.sum += value
+    h.count++
+  }
+
+  render() {
+    const lines = this.header()
+
+    for (const { labels, value: h } of this.series.values()) {
+      let cumulative = 0
+      this.buckets.forEach((bound, i) => {
+        cumulative += h.counts[i]
+        lines.push(
+          `${this.name}_bucket${formatLabels({ ...labels, le: bound })} ${cumulative}`
+        )
+      })
+      lines.push(`${this.name}_bucket${formatLabels({ ...labels, le: "+Inf" })} ${h.count}`)
+      lines.push(`${this.name}_sum${formatLabels(labels)} ${h.sum}`)
+      lines.push(`${this.name}_count${formatLabels(labels)} ${h.count}`)
+    }
+    return lines
+  }
+}
+
+class Registry {
+  constructor() {
+    this.metrics = []
+  }
+
+  add(metric) {
+    this.metrics.push(metric)
+    return metric
+  }
+
+  counter(name, help, labelNames, collect) {
+    return this.add(new Counter(name, help, labelNames, collect))
+  }
+
+  gauge(name, help, labelNames, collect) {
+    return this.add(new Gauge(name, help, labelNames, collect))
+  }
+
+  histogram(name, help, labelNames, buckets) {
+    return this.add(new Histogram(name, help, labelNames, buckets))
+  }
+
+  render() {
+    return this.metrics.flatMap((metric) => metric.render()).join("\n") + "\n"
+  }
+}
+
+// Seconds, from sub-millisecond parses up to the run timeout
+const LATENCY_BUCKETS = [
+  0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+  0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+]
+
+// Bytes of program output
+const SIZE_BUCKETS = [0, 64, 256, 1024, 4096, 16384, 65536, 262144, 1048576]
+
+module.exports = {
+  Registry,
+  Counter,
+  Gauge,
+  Histogram,
+  LATENCY_BUCKETS,
+  SIZE_BUCKETS,
+}
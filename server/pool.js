@@ -0,0 +1,302 @@
+const { spawn } = require("child_process")
+const os = require("os")
+
+// --------------------------------------------------
+// FRAMING
+// 4-byte big-endian length followed by UTF-8 JSON,
+// matching quirk/serve.py
+// --------------------------------------------------
+
+function encodeFrame(message) {
+  const body = Buffer.from(JSON.stringify(message), "utf8")
+  const header = Buffer.alloc(4)
+  header.writeUInt32BE(body.length, 0)
+  return Buffer.concat([header, body])
+}
+
+// --------------------------------------------------
+// WORKER
+// --------------------------------------------------
+
+class Worker {
+  constructor(pool) {
+    this.pool = pool
+    this.job = null
+    this.buffer = Buffer.alloc(0)
+    this.retired = false
+    this.spawned = false
+    // Set once the worker has answered a job or outlived
+    // respawnGraceMs; dying before that counts as a failed spawn
+    this.ready = false
+    this.exited = false
+
+    const {
+      python, cwd, mode, maxJobs, maxMemoryMb, rlimitAsMb, timeout, preload,
+    } = pool.options
+
+    // "zygote" forks a sandboxed child per program from one warm
+    // parent; "serve" runs programs in the worker process itself
+    const args = mode === "zygote"
+      ? [
+          "-m", "quirk.cli", "zygote",
+          "--memory-mb", String(maxMemoryMb),
+          "--timeout", String(timeout / 1000),
+          ...preload.flatMap((name) => ["--preload", name]),
+        ]
+      : [
+          "-m", "quirk.cli", "serve",
+          "--max-jobs", String(maxJobs),
+          "--max-memory-mb", String(maxMemoryMb),
+          "--rlimit-as-mb", String(rlimitAsMb),
+        ]
+
+    const started = process.hrtime.bigint()
+    this.proc = spawn(python, args, { cwd, stdio: ["pipe", "pipe", "inherit"] })
+
+    this.proc.on("spawn", () => {
+      this.spawned = true
+      this.grace = setTimeout(() => this.settle(), this.pool.options.respawnGraceMs)
+      const { onSpawn } = this.pool.options
+      if (onSpawn) onSpawn(Number(process.hrtime.bigint() - started) / 1e9)
+    })
+
+    this.proc.stdout.on("data", (chunk) => this.onData(chunk))
+    this.proc.on("exit", () => this.onExit())
+    this.proc.on("error", (err) => this.onError(err))
+    // EPIPE when the worker dies while a frame is being written; the
+    // exit that follows (forced, if need be) replaces the worker
+    this.proc.stdin.on("error", () => {
+      this.fail("Internal Error: Worker exited unexpectedly.")
+      this.proc.kill("SIGKILL")
+    })
+  }
+
+  run(job) {
+    this.job = job
+    // Zygote children enforce their own limit; this is only a backstop
+    const { mode, timeout } = this.pool.options
+    const backstop = mode === "zygote" ? timeout + 1000 : timeout
+    job.timer = setTimeout(() => this.onTimeout(), backstop)
+    const frame = { id: job.id, code: job.code, stream: Boolean(job.onOutput) }
+    if (job.check) frame.check = true
+    if (this.pool.options.maxSteps) frame.max_steps = this.pool.options.maxSteps
+    if (this.pool.options.maxProgramMemoryMb) {
+      frame.max_memory = this.pool.options.maxProgramMemoryMb * 1024 * 1024
+    }
+    if (this.pool.options.stats) frame.stats = true
+    this.proc.stdin.write(encodeFrame(frame))
+  }
+
+  onData(chunk) {
+    this.buffer = Buffer.concat([this.buffer, chunk])
+
+    while (this.buffer.length >= 4) {
+      const length = this.buffer.readUInt32BE(0)
+      if (this.buffer.length < 4 + length) return
+
+      const body = this.buffer.subarray(4, 4 + length).toString("utf8")
+      this.buffer = this.buffer.subarray(4 + length)
+
+      let message
+      try {
+        message = JSON.parse(body)
+      } catch (err) {
+        // The stream can no longer be trusted to be in step
+        console.error("quirk worker sent a corrupt frame:", err.message)
+        this.buffer = Buffer.alloc(0)
+        this.fail("Internal Error: Worker sent a corrupt result.")
+        this.proc.kill("SIGKILL")
+        return
+      }
+
+      if (message.type === "output") {
+        if (this.job && this.job.onOutput) this.job.onOutput(message.data)
+        continue
+      }
+
+      this.settle()
+      if (message.recycle) this.retired = true
+      this.finish(message)
+    }
+  }
+
+  onTimeout() {
+    this.retired = true
+    this.finish({
+      status: "timeout",
+      output: "",
+      error: "Time limit exceeded.",
+      line: null,
+    })
+    this.proc.kill("SIGKILL")
+  }
+
+  settle() {
+    if (this.ready) return
+    this.ready = true
+    clearTimeout(this.grace)
+    this.pool.failures = 0
+  }
+
+  onExit() {
+    if (this.exited) return
+    this.exited = true
+    clearTimeout(this.grace)
+    this.fail("Internal Error: Worker exited unexpectedly.")
+    // e.g. quirk not importable, or an address-space limit too low
+    // for the interpreter to start
+    this.pool.replace(this, { failed: !this.ready })
+  }
+
+  onError(err) {
+    // After a successful spawn this is a failed kill() or similar;
+    // the exit event still follows
+    if (this.spawned) {
+      console.error("quirk worker error:", err.message)
+      return
+    }
+
+    console.error("quirk worker failed to start:", err.message)
+    if (this.exited) return
+    this.exited = true
+    this.fail("Internal Error: Worker failed to start.")
+    this.pool.replace(this, { failed: true })
+  }
+
+  fail(error) {
+    this.retired = true
+    this.finish({ status: "internal_error", output: "", error, line: null })
+  }
+
+  finish(result) {
+    const job = this.job
+    if (!job) return
+
+    this.job = null
+    clearTimeout(job.timer)
+    job.resolve(result)
+
+    if (!this.retired) this.pool.release(this)
+  }
+}
+
+// --------------------------------------------------
+// POOL
+// --------------------------------------------------
+
+class WorkerPool {
+  constructor(options = {}) {
+    const overrides = Object.fromEntries(
+      Object.entries(options).filter(([, value]) => value !== undefined)
+    )
+
+    this.options = {
+      python: process.env.PYTHON || "python",
+      cwd: process.cwd(),
+      mode: "serve",
+      preload: [],
+      size: os.cpus().length,
+      maxJobs: 500,
+      maxMemoryMb: 256,
+      // Hard RLIMIT_AS for "serve" workers (zygote children use
+      // maxMemoryMb); 0 disables it
+      rlimitAsMb: 0,
+      maxSteps: null,
+      maxProgramMemoryMb: null,
+      stats: false,
+      timeout: 5000,
+      // Called with the seconds each worker process took to spawn
+      onSpawn: null,
+      // Delay before respawning after a failed spawn, doubled for
+      // each failure in a row up to respawnMaxMs
+      respawnMs: 100,
+      respawnMaxMs: 10000,
+      // How long a new worker must stay up, if it answers no job, to
+      // count as started
+      respawnGraceMs: 1000,
+      ...overrides,
+    }
+
+    this.nextId = 1
+    this.idle = []
+    this.pending = []
+    this.workers = new Set()
+    this.closed = false
+    // Failed spawns since the last successful one
+    this.failures = 0
+    this.respawns = new Set()
+
+    for (let i = 0; i < this.options.size; i++) this.spawn()
+  }
+
+  spawn() {
+    const worker = new Worker(this)
+    this.workers.add(worker)
+    this.idle.push(worker)
+  }
+
+  // check: lex, parse and statically check only; resolves with
+  // { status, diagnostics }
+  run(code, { onOutput, check } = {}) {
+    return new Promise((resolve) => {
+      this.pending.push({ id: this.nextId++, code, onOutput, check, resolve })
+      this.dispatch()
+    })
+  }
+
+  dispatch() {
+    while (this.idle.length && this.pending.length) {
+      this.idle.pop().run(this.pending.shift())
+    }
+  }
+
+  release(worker) {
+    this.idle.push(worker)
+    this.dispatch()
+  }
+
+  replace(worker, { failed = false } = {}) {
+    this.workers.delete(worker)
+    this.idle = this.idle.filter((w) => w !== worker)
+    if (this.closed) return
+
+    if (!failed) {
+      this.spawn()
+      this.dispatch()
+      return
+    }
+
+    // With no worker running, queued jobs would wait out the whole
+    // backoff; fail them now
+    if (![...this.workers].some((w) => w.spawned)) {
+      for (const job of this.pending.splice(0)) {
+        job.resolve({
+          status: "internal_error",
+          output: "",
+          error: "Internal Error: Worker failed to start.",
+          line: null,
+        })
+      }
+    }
+
+    const { respawnMs, respawnMaxMs } = this.options
+    const delay = Math.min(respawnMs * 2 ** this.failures, respawnMaxMs)
+    this.failures++
+
+    const timer = setTimeout(() => {
+      this.respawns.delete(timer)
+      if (this.closed) return
+      this.spawn()
+      this.dispatch()
+    }, delay)
+    this.respawns.add(timer)
+  }
+
+  close() {
+    this.closed = true
+    for (const timer of this.respawns) clearTimeout(timer)
+    for (const worker of this.workers) worker.proc.kill()
+  }
+}
+
+module.exports = { WorkerPool }
@@ -0,0 +1,163 @@
+// --------------------------------------------------
+// ADMISSION CONTROL
+// At most `concurrency` tasks run at once. Waiting tasks
+// are queued per client and dispatched round-robin, so one
+// busy client cannot starve the others; within a client,
+// its sessions take turns the same way but share the
+// client's quota. Once the queue (or a client's share of
+// it) is full, submit() throws QueueFullError straight
+// away instead of letting waits grow.
+// --------------------------------------------------
+
+class QueueFullError extends Error {
+  constructor(message) {
+    super(message)
+    this.name = "QueueFullError"
+  }
+}
+
+class Scheduler {
+  constructor({ concurrency, maxQueue = 64, maxPerClient = 4 } = {}) {
+    this.concurrency = concurrency
+    this.maxQueue = maxQueue
+    this.maxPerClient = maxPerClient
+
+    this.running = 0
+    this.queued = 0
+    this.queues = new Map() // client -> { sessions: session -> [entry], turns }
+    this.turns = [] // clients with queued work, in round-robin order
+    this.active = new Map() // client -> queued + running
+
+    this.admitted = 0
+    this.rejected = 0
+    this.cancelled = 0
+  }
+
+  // Resolves with { value, waitMs } once task() has run. Throws
+  // QueueFullError synchronously when the request cannot be queued.
+  // Aborting `signal` while the task is still queued drops it.
+  // `session` only orders work within the client's own share.
+  submit(client, task, { signal, session = "" } = {}) {
+    const share = this.active.get(client) || 0
+
+    if (this.queued >= this.maxQueue) {
+      this.rejected++
+      throw new QueueFullError("Server busy: run queue is full")
+    }
+    if (share >= this.maxPerClient) {
+      this.rejected++
+      throw new QueueFullError("Too many runs in flight for this client")
+    }
+
+    this.admitted++
+    this.active.set(client, share + 1)
+
+    return new Promise((resolve, reject) => {
+      const entry = { client, session, task, resolve, reject, queuedAt: Date.now() }
+
+      if (signal) {
+        signal.addEventListener("abort", () => this.cancel(entry), { once: true })
+      }
+
+      let group = this.queues.get(client)
+      if (!group) {
+        group = { sessions: new Map(), turns: [] }
+        this.queues.set(client, group)
+        this.turns.push(client)
+      }
+
+      let queue = group.sessions.get(session)
+      if (!queue) {
+        queue = []
+        group.sessions.set(session, queue)
+        group.turns.push(session)
+      }
+      queue.push(entry)
+      this.queued++
+
+      this.dispatch()
+    })
+  }
+
+  dispatch() {
+    while (this.running < this.concurrency && this.turns.length) {
+      const client = this.turns.shift()
+      const group = this.queues.get(client)
+      const session = group.turns.shift()
+      const queue = group.sessions.get(session)
+      const entry = queue.shift()
+
+      if (queue.length) group.turns.push(session)
+      else group.sessions.delete(session)
+
+      if (group.turns.length) this.turns.push(client)
+      else this.queues.delete(client)
+
+      this.queued--
+      this.start(entry)
+    }
+  }
+
+  async start(entry) {
+    const waitMs = Date.now() - entry.queuedAt
+    entry.started = true
+    this.running++
+
+    try {
+      entry.resolve({ value: await entry.task(), waitMs })
+    } catch (err) {
+      entry.reject(err)
+    } finally {
+      this.running--
+      this.leave(entry.client)
+      this.dispatch()
+    }
+  }
+
+  cancel(entry) {
+    if (entry.started) return
+
+    const group = this.queues.get(entry.client)
+    const queue = group && group.sessions.get(entry.session)
+    const index = queue ? queue.indexOf(entry) : -1
+    if (index === -1) return
+
+    queue.splice(index, 1)
+    if (!queue.length) {
+      group.sessions.delete(entry.session)
+      group.turns = group.turns.filter((s) => s !== entry.session)
+    }
+    if (!group.turns.length) {
+      this.queues.delete(entry.client)
+      this.turns = this.turns.filter((c) => c !== entry.client)
+    }
+
+    this.queued--
+    this.cancelled++
+    this.leave(entry.client)
+
+    const err = new Error("Cancelled while queued")
+    err.name = "AbortError"
+    entry.reject(err)
+  }
+
+  leave(client) {
+    const share = this.active.get(client) - 1
+    if (share > 0) this.active.set(client, share)
+    else this.active.delete(client)
+  }
+
+  stats() {
+    return {
+      concurrency: this.concurrency,
+      running: this.running,
+      queued: this.queued,
+      clients: this.active.size,
+      admitted: this.admitted,
+      rejected: this.rejected,
+      cancelled: this.cancelled,
+    }
+  }
+}
+
+module.exports = { Scheduler, QueueFullError }